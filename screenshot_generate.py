@@ -56,11 +56,15 @@ def extract_screenshots(video_path, output_dir='screenshots', interval=2):
     print(f"🎞 Processing at {fps} FPS, every {interval}s (interval = {frame_interval} frames)")
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
+        # grab() still decodes every frame; retrieve() only converts the sampled
+        # ones to BGR.
+        if not cap.grab():
             break
 
         if count % frame_interval == 0:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
             timestamp_sec = count / fps
             print(f"\n🔍 Frame {count} (Time: {timestamp_sec:.2f}s)")
 
@@ -0,0 +1,259 @@
+"""Time the summarization pipeline stage by stage.
+
+Run from the server directory:
+
+    python -m benchmarks.pipeline                          # synthetic short + medium videos
+    python -m benchmarks.pipeline --presets short,long --skip-transcribe
+    python -m benchmarks.pipeline --video path/to/lecture.mp4
+
+Synthetic videos are generated once per preset and seed and kept under
+.cache/benchmarks. Each video is benchmarked in a fresh process, where every
+stage of run_pipeline except the Cloudinary upload runs on its own: audio
+loading, transcription, screenshot extraction and PDF generation. The JSON
+report has the wall time and peak RSS of each stage, the peak RSS of the
+ffmpeg and tesseract subprocesses, the frames decoded, sampled and sent to
+OCR, and, for synthetic videos, how many of the known slide text changes ended
+up with a screenshot.
+"""
+
+import argparse
+import bisect
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from benchmarks.synthetic import PRESETS, generate
+from summarizer.config import AUDIO_SAMPLE_RATE, FFMPEG_PATH, SAMPLING_METHOD, TRANSCRIBE_BACKEND, WHISPER_MODEL
+from summarizer.pdf import generate_pdf_summary
+from summarizer.screenshots import extract_screenshots
+from summarizer.timeline import merge_timeline
+from summarizer.transcription import load_audio_from_video, load_transcriber, transcribe_audio_to_segments
+
+VIDEO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "benchmarks")
+
+
+def reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0+).
+    # Elsewhere the peak can't be reset and stays the running maximum.
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def timed(report, stage, func, *args, **kwargs):
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    report[stage] = {"seconds": round(time.perf_counter() - start, 3), "peak_rss_mb": peak_rss_mb()}
+    return result
+
+
+def keyframe_indices(video_path, fps):
+    # Frame numbers of the video's keyframes from ffprobe next to ffmpeg, or
+    # None without it
+    directory, name = os.path.split(FFMPEG_PATH)
+    command = [
+        os.path.join(directory, name.replace("ffmpeg", "ffprobe")), "-v", "error", "-select_streams", "v:0",
+        "-skip_frame", "nokey", "-show_entries", "frame=pts_time", "-of", "csv=p=0", video_path
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sorted(round(float(line) * fps) for line in output.split() if line.strip())
+
+
+@contextlib.contextmanager
+def count_decoder_work():
+    # Records what the samplers ask of cv2.VideoCapture: every read or grab
+    # decodes one frame, and every seek lands on the preceding keyframe and
+    # decodes its way forward (see frames_decoded)
+    work = {"reads": 0, "seeks": []}
+    original = cv2.VideoCapture
+
+    class CountingCapture(original):
+        def read(self, *args):
+            work["reads"] += 1
+            return super().read(*args)
+
+        def grab(self):
+            work["reads"] += 1
+            return super().grab()
+
+        def set(self, prop, value):
+            if prop == cv2.CAP_PROP_POS_FRAMES:
+                work["seeks"].append(int(value))
+            return super().set(prop, value)
+
+    cv2.VideoCapture = CountingCapture
+    try:
+        yield work
+    finally:
+        cv2.VideoCapture = original
+
+
+def frames_decoded(video_path, sampling_method, work):
+    cap = cv2.VideoCapture(video_path)
+    fps, frame_count = cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if sampling_method == "ffmpeg":
+        # The fps filter sees every frame
+        return frame_count
+    if not work["seeks"]:
+        return work["reads"]
+    keyframes = keyframe_indices(video_path, fps)
+    if not keyframes:
+        return None
+    skipped = sum(target - keyframes[max(bisect.bisect_right(keyframes, target) - 1, 0)] for target in work["seeks"])
+    return work["reads"] + skipped
+
+
+def synthetic_video(preset, seed):
+    os.makedirs(VIDEO_DIR, exist_ok=True)
+    path = os.path.join(VIDEO_DIR, f"{preset}-{seed}.mp4")
+    if not (os.path.exists(path) and os.path.exists(path + ".json")):
+        print(f"[BENCH] Generating {preset} video (seed {seed})", file=sys.stderr)
+        generate(path, seed=seed, **PRESETS[preset])
+    with open(path + ".json", encoding="utf-8") as file:
+        return path, json.load(file)
+
+
+def captured_changes(text_changes, screenshots):
+    # A text change counts as captured when a screenshot falls between it
+    # and the next change
+    times = sorted(shot["time"] for shot in screenshots)
+    captured = 0
+    for index, change in enumerate(text_changes):
+        until = text_changes[index + 1] if index + 1 < len(text_changes) else float("inf")
+        position = bisect.bisect_left(times, change)
+        if position < len(times) and times[position] < until:
+            captured += 1
+    return captured
+
+
+def run_video(video_path, manifest=None, interval=2, sampling_method=SAMPLING_METHOD, model_name=WHISPER_MODEL,
+              backend=TRANSCRIBE_BACKEND, skip_transcribe=False):
+    stages = {}
+    workspace = tempfile.mkdtemp(prefix="bench-")
+    try:
+        segments = []
+        if not skip_transcribe:
+            # Model loading is a worker start-up cost, not part of a job
+            timed(stages, "load_model", load_transcriber, backend, model_name)
+            audio = timed(stages, "audio", load_audio_from_video, video_path)
+            segments = timed(stages, "transcribe", transcribe_audio_to_segments, audio,
+                             os.path.join(workspace, "transcript.txt"), model_name, backend)
+            stages["audio"]["audio_seconds"] = round(len(audio) / AUDIO_SAMPLE_RATE, 1)
+            stages["transcribe"]["segments"] = len(segments)
+            del audio
+
+        counts = {}
+
+        def progress(event):
+            if event.get("status") == "done":
+                counts.update(event)
+
+        with count_decoder_work() as work:
+            screenshots = timed(stages, "screenshots", extract_screenshots, video_path,
+                                os.path.join(workspace, "screenshots"), interval, sampling_method, progress=progress)
+        stages["screenshots"].update({
+            "frames_decoded": frames_decoded(video_path, sampling_method, work),
+            "frames_sampled": counts.get("frames_sampled"),
+            "frames_ocr": counts.get("frames_ocr"),
+            "screenshots": len(screenshots),
+        })
+        if manifest:
+            stages["screenshots"]["text_changes"] = len(manifest["text_changes"])
+            stages["screenshots"]["text_changes_captured"] = captured_changes(manifest["text_changes"], screenshots)
+
+        pdf_path = os.path.join(workspace, "summary.pdf")
+        timed(stages, "pdf", generate_pdf_summary, merge_timeline(segments, screenshots), pdf_path)
+        stages["pdf"]["bytes"] = os.path.getsize(pdf_path)
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    return {
+        "video": video_path,
+        "synthetic": {k: manifest[k] for k in ("minutes", "size", "fps", "seed")} if manifest else None,
+        "total_seconds": round(sum(stage["seconds"] for name, stage in stages.items() if name != "load_model"), 3),
+        # Largest ffmpeg or tesseract process of the run
+        "children_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "stages": stages,
+    }
+
+
+def run_video_isolated(*args):
+    # A fresh process per video, so neither the peak RSS of its subprocesses
+    # nor a model loaded for an earlier video carries over into its report
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_video, *args).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", action="append", default=[], help="benchmark a real video (repeatable)")
+    parser.add_argument("--presets", default="short,medium",
+                        help="comma separated subset of %s, empty for none" % ", ".join(PRESETS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=int, default=2)
+    parser.add_argument("--sampling", default=SAMPLING_METHOD)
+    parser.add_argument("--model", default=WHISPER_MODEL)
+    parser.add_argument("--backend", default=TRANSCRIBE_BACKEND)
+    parser.add_argument("--skip-transcribe", action="store_true")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    videos = [(path, None) for path in args.video]
+    videos += [synthetic_video(preset, args.seed) for preset in args.presets.split(",") if preset]
+
+    report = {
+        "settings": {
+            "interval": args.interval,
+            "sampling": args.sampling,
+            "model": None if args.skip_transcribe else args.model,
+            "backend": None if args.skip_transcribe else args.backend,
+            "cpus": os.cpu_count(),
+            "peak_rss": "per stage" if reset_peak_rss() else "running maximum per video",
+        },
+        "runs": [],
+    }
+    for video_path, manifest in videos:
+        print(f"[BENCH] {video_path}", file=sys.stderr)
+        report["runs"].append(run_video_isolated(video_path, manifest, args.interval, args.sampling, args.model,
+                                                 args.backend, args.skip_transcribe))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare the frame sampling methods of the pipeline on one video.
+
+Run from the server directory:
+
+    python -m benchmarks.sampling path/to/lecture.mp4 --interval 2
+
+Prints a JSON report with wall time and sampled frame count per method, and
+how far each method's sampled frames are from the original read() loop.
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+
+from summarizer.config import SAMPLING_METHODS
+from summarizer.frames import iter_sampled_frames
+
+
+def run_method(video_path, interval, method):
+    frames = {}
+    start = time.perf_counter()
+    for frame in iter_sampled_frames(video_path, interval, method):
+        # Keep a small thumbnail only, so memory use doesn't skew the timings.
+        frames[round(frame.time, 2)] = cv2.resize(frame.image, (64, 36), interpolation=cv2.INTER_AREA)
+    elapsed = time.perf_counter() - start
+    return elapsed, frames
+
+
+def compare_to_baseline(baseline, frames):
+    common = sorted(set(baseline) & set(frames))
+    if not common:
+        return None
+    diffs = [float(cv2.absdiff(baseline[t], frames[t]).mean()) for t in common]
+    return {
+        "matched_timestamps": len(common),
+        "missing_timestamps": len(set(baseline) - set(frames)),
+        "mean_abs_pixel_diff": sum(diffs) / len(diffs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--interval", type=int, default=2)
+    parser.add_argument("--methods", default=",".join(SAMPLING_METHODS),
+                        help="comma separated subset of %s" % ", ".join(SAMPLING_METHODS))
+    args = parser.parse_args()
+
+    methods = [m for m in args.methods.split(",") if m]
+    if "read" not in methods:
+        methods.insert(0, "read")
+
+    report = {"video": args.video, "interval": args.interval, "methods": {}}
+    baseline = None
+    for method in methods:
+        elapsed, frames = run_method(args.video, args.interval, method)
+        if method == "read":
+            baseline = frames
+        result = {"seconds": round(elapsed, 3), "sampled_frames": len(frames)}
+        if method != "read":
+            result["speedup"] = round(report["methods"]["read"]["seconds"] / elapsed, 2) if elapsed else None
+            result["vs_read"] = compare_to_baseline(baseline, frames)
+        report["methods"][method] = result
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Check the repeated-slide index against the linear Levenshtein scan.
+
+Run from the server directory:
+
+    python -m benchmarks.similarity                     # OCR text from the result cache
+    python -m benchmarks.similarity --texts slides.json --saved 500
+
+Saved slide texts come from the result cache (the OCR text of every cached
+screenshot), from a JSON list of strings, or, to make up the numbers, from
+synthetic slides. Each saved text is queried again with random character edits
+that put it in a given Levenshtein ratio range around the 0.85 threshold, and
+fresh slides are queried as well. The JSON report has, per kind of query, how
+often TextSimilarityIndex.contains_similar() disagreed with the linear scan it
+replaces, the mean number of exact Levenshtein checks each ran, and the time
+per query of both.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import time
+
+from Levenshtein import ratio as levenshtein_ratio
+
+import summarizer.screenshots
+
+from benchmarks.synthetic import random_line
+from summarizer.config import CACHE_DIR
+from summarizer.screenshots import TextSimilarityIndex, clean_text
+
+THRESHOLD = 0.85
+RANGES = ((0.85, 0.90), (0.90, 0.95), (0.95, 1.0))
+
+
+def cached_texts(cache_dir=CACHE_DIR):
+    texts = []
+    for result_file in glob.glob(os.path.join(cache_dir, "*", "result.json")):
+        with open(result_file, encoding="utf-8") as file:
+            texts += [shot["text"] for shot in json.load(file)["screenshots"]]
+    return texts
+
+
+def synthetic_text(rng):
+    return "\n".join(random_line(rng, rng.randint(2, 8)) for _ in range(rng.randint(1, 6)))
+
+
+def edit_into_range(rng, text, low, high, attempts=100):
+    # Random substitutions, insertions and deletions until the ratio to
+    # `text` lands in (low, high]; None if it overshoots every time
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 "
+    for _ in range(attempts):
+        edited = list(text)
+        while True:
+            position = rng.randrange(len(edited) + 1)
+            operation = rng.random()
+            if operation < 0.4 and position < len(edited):
+                edited[position] = rng.choice(alphabet)
+            elif operation < 0.7:
+                edited.insert(position, rng.choice(alphabet))
+            elif position < len(edited):
+                del edited[position]
+            similarity = levenshtein_ratio(text, "".join(edited))
+            if similarity <= low:
+                break
+            if similarity <= high and rng.random() < 0.3:
+                return "".join(edited)
+    return None
+
+
+class CountingRatio:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, a, b):
+        self.calls += 1
+        return levenshtein_ratio(a, b)
+
+
+def compare(index, saved, queries):
+    counting = CountingRatio()
+    summarizer.screenshots.levenshtein_ratio = counting
+    try:
+        start = time.perf_counter()
+        indexed = [index.contains_similar(query) for query in queries]
+        indexed_seconds = time.perf_counter() - start
+    finally:
+        summarizer.screenshots.levenshtein_ratio = levenshtein_ratio
+    linear_checks = 0
+    start = time.perf_counter()
+    linear = []
+    for query in queries:
+        found = False
+        for text in saved:
+            linear_checks += 1
+            if levenshtein_ratio(text, query) > THRESHOLD:
+                found = True
+                break
+        linear.append(found)
+    linear_seconds = time.perf_counter() - start
+
+    count = max(len(queries), 1)
+    return {
+        "queries": len(queries),
+        "matches": sum(linear),
+        "disagreements": sum(a != b for a, b in zip(indexed, linear)),
+        "indexed_checks_per_query": round(counting.calls / count, 1),
+        "linear_checks_per_query": round(linear_checks / count, 1),
+        "indexed_ms_per_query": round(1000 * indexed_seconds / count, 3),
+        "linear_ms_per_query": round(1000 * linear_seconds / count, 3),
+    }
+
+
+def run(saved, fresh, rng):
+    index = TextSimilarityIndex(threshold=THRESHOLD)
+    for text in saved:
+        index.add(text)
+
+    report = {}
+    for low, high in RANGES:
+        queries = [edited for edited in (edit_into_range(rng, text, low, high) for text in saved) if edited]
+        report[f"edited {low:.2f}-{high:.2f}"] = compare(index, saved, queries)
+    report["new slides"] = compare(index, saved, fresh)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", help="JSON list of slide texts instead of the result cache")
+    parser.add_argument("--saved", type=int, default=300, help="texts in the index")
+    parser.add_argument("--fresh", type=int, default=300, help="unrelated texts to query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as file:
+            texts = json.load(file)
+    else:
+        texts = cached_texts()
+    real = len(texts)
+    texts += [synthetic_text(rng) for _ in range(max(args.saved + args.fresh - len(texts), 0))]
+
+    # The pipeline indexes cleaned OCR text, one entry per distinct slide
+    rng.shuffle(texts)
+    cleaned = list(dict.fromkeys(text for text in map(clean_text, texts) if text))
+    saved, fresh = cleaned[:args.saved], cleaned[args.saved:args.saved + args.fresh]
+    print(json.dumps({"saved": len(saved), "real_texts": real, "queries": run(saved, fresh, rng)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
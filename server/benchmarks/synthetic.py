@@ -0,0 +1,192 @@
+"""Generate synthetic lecture videos with a known slide timeline.
+
+Run from the server directory:
+
+    python -m benchmarks.synthetic out.mp4 --minutes 5 --size 1280x720
+
+Each video is a sequence of rendered slides whose bullet points are revealed
+one at a time, with long static stretches in between, blurry cross-fades at
+slide changes and a soundtrack of speech-like bursts separated by pauses.
+Everything comes from a seeded random generator, so the same arguments always
+produce the same video. The times at which the slide text changes are written
+next to the video as <video>.json, for checking how many of them the pipeline
+captured.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+import wave
+
+import cv2
+import numpy as np
+
+from summarizer.config import AUDIO_SAMPLE_RATE, FFMPEG_PATH
+
+WORDS = (
+    "gradient descent converges when the learning rate is small enough matrix eigenvalue "
+    "vector space linear map kernel image basis dimension proof lemma theorem corollary "
+    "entropy probability distribution sample variance expectation estimator bias model "
+    "network layer activation function loss optimizer batch epoch memory cache thread "
+    "process scheduler latency throughput queue stack heap graph tree search sort"
+).split()
+
+# Named sizes for benchmark runs
+PRESETS = {
+    "short": {"minutes": 2, "size": (640, 360)},
+    "medium": {"minutes": 10, "size": (1280, 720)},
+    "long": {"minutes": 30, "size": (1920, 1080)},
+}
+
+
+def random_line(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def plan_slides(rng, duration, slide_seconds, bullets):
+    # [(start, end, title, [bullet, ...], [reveal time of each bullet, ...])]
+    slides = []
+    start = 0.0
+    while start < duration:
+        end = min(start + slide_seconds * rng.uniform(0.7, 1.3), duration)
+        count = rng.randint(max(bullets - 2, 1), bullets)
+        # The first bullet comes up with the slide, the rest spread over its first half
+        reveals = sorted([start] + [rng.uniform(start, (start + end) / 2) for _ in range(count - 1)])
+        slides.append((start, end, random_line(rng, 3), [random_line(rng, rng.randint(4, 7)) for _ in range(count)],
+                       reveals))
+        start = end
+    return slides
+
+
+def render_slide(size, title, lines):
+    width, height = size
+    scale = height / 720
+    image = np.full((height, width, 3), 255, np.uint8)
+    cv2.putText(image, title, (int(60 * scale), int(110 * scale)), cv2.FONT_HERSHEY_DUPLEX,
+                1.6 * scale, (40, 40, 40), max(int(3 * scale), 1), cv2.LINE_AA)
+    for index, line in enumerate(lines):
+        y = int((200 + 70 * index) * scale)
+        cv2.circle(image, (int(75 * scale), y - int(10 * scale)), max(int(6 * scale), 2), (60, 60, 60), -1)
+        cv2.putText(image, line, (int(100 * scale), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.9 * scale, (20, 20, 20), max(int(2 * scale), 1), cv2.LINE_AA)
+    return image
+
+
+def slide_states(slides):
+    # Every distinct picture, as (start, end, title, visible bullets)
+    for start, end, title, lines, reveals in slides:
+        for index, reveal in enumerate(reveals):
+            until = reveals[index + 1] if index + 1 < len(reveals) else end
+            yield reveal, until, title, lines[:index + 1]
+
+
+def write_video(path, size, fps, slides, transition_seconds):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open a video writer for {path}")
+
+    states = list(slide_states(slides))
+    frame_count = int(round(slides[-1][1] * fps))
+    previous = None
+    try:
+        for start, end, title, lines in states:
+            image = render_slide(size, title, lines)
+            first, last = int(round(start * fps)), min(int(round(end * fps)), frame_count)
+            # A new slide fades in through a blur; revealing a bullet is a hard cut
+            fade = int(transition_seconds * fps) if previous is not None and len(lines) == 1 else 0
+            for index in range(first, last):
+                if index - first < fade:
+                    alpha = (index - first + 1) / (fade + 1)
+                    mixed = cv2.addWeighted(previous, 1 - alpha, image, alpha, 0)
+                    writer.write(cv2.GaussianBlur(mixed, (0, 0), 6 * (1 - abs(2 * alpha - 1)) + 0.5))
+                else:
+                    writer.write(image)
+            previous = image
+    finally:
+        writer.release()
+    return frame_count
+
+
+def write_audio(path, rng, duration, slides, sample_rate=AUDIO_SAMPLE_RATE):
+    # Voiced bursts (a few harmonics with a syllable-rate envelope) with short
+    # pauses between them and a longer one at every slide change
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    audio = np.zeros(int(duration * sample_rate), np.float32)
+    slide_starts = [start for start, *_ in slides[1:]]
+    t = 0.5
+    while t < duration:
+        length = rng.uniform(0.3, 2.5)
+        first, last = int(t * sample_rate), min(int((t + length) * sample_rate), len(audio))
+        times = np.arange(last - first) / sample_rate
+        pitch = rng.uniform(100, 220)
+        voice = sum(np.sin(2 * np.pi * pitch * k * times) / k for k in range(1, 5))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 6) * times)
+        audio[first:last] = 0.2 * voice * envelope + 0.01 * np_rng.standard_normal(last - first)
+        t += length + rng.uniform(0.1, 0.6)
+        if slide_starts and t >= slide_starts[0] - 1:
+            t = slide_starts.pop(0) + rng.uniform(2, 4)
+
+    with wave.open(path, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def generate(path, minutes=2, size=(640, 360), fps=25, slide_seconds=60, bullets=4, transition_seconds=1.0,
+             seed=0):
+    rng = random.Random(seed)
+    duration = minutes * 60
+    slides = plan_slides(rng, duration, slide_seconds, bullets)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        silent_video = os.path.join(scratch, "video.mp4")
+        audio = os.path.join(scratch, "audio.wav")
+        frames = write_video(silent_video, size, fps, slides, transition_seconds)
+        write_audio(audio, rng, duration, slides)
+        subprocess.run([
+            FFMPEG_PATH, "-nostdin", "-v", "error", "-y", "-i", silent_video, "-i", audio,
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path
+        ], check=True)
+
+    manifest = {
+        "minutes": minutes,
+        "size": list(size),
+        "fps": fps,
+        "frames": frames,
+        "seed": seed,
+        "text_changes": [round(start, 3) for start, *_ in slide_states(slides)],
+        "slides": [{"start": round(start, 3), "end": round(end, 3), "title": title, "bullets": lines}
+                   for start, end, title, lines, _ in slides],
+    }
+    with open(path + ".json", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--minutes", type=float, default=2)
+    parser.add_argument("--size", type=parse_size, default=(640, 360), help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--slide-seconds", type=float, default=60)
+    parser.add_argument("--bullets", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate(args.output, args.minutes, args.size, args.fps, args.slide_seconds, args.bullets,
+                        seed=args.seed)
+    print(json.dumps({k: manifest[k] for k in ("minutes", "size", "fps", "frames")}))
+
+
+if __name__ == "__main__":
+    main()
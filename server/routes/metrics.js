@@ -0,0 +1,19 @@
+const express = require("express");
+const { registry } = require("../services/metrics");
+
+const router = express.Router();
+
+// GET /metrics
+// Prometheus scrape endpoint. Open unless METRICS_TOKEN is set, in which case
+// the scraper has to send it as a bearer token.
+router.get("/metrics", (req, res) => {
+  const token = process.env.METRICS_TOKEN;
+  if (token && req.get("Authorization") !== `Bearer ${token}`) {
+    return res.status(401).json({ success: false, error: "Unauthorized" });
+  }
+
+  res.set("Content-Type", "text/plain; version=0.0.4; charset=utf-8");
+  return res.send(registry.render());
+});
+
+module.exports = router;
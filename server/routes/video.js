@@ -1,10 +1,10 @@
 const express = require("express");
 const multer = require("multer");
-const { spawn } = require("child_process");
 const path = require("path");
 const fs = require("fs");
 const auth=require("../middlewares/userMiddleware");
 const User = require("../models/usermodel");
+const { jobQueue, QueueFullError } = require("../services/jobQueue");
 
 const router = express.Router();
 
@@ -19,53 +19,137 @@ const storage = multer.diskStorage({
 });
 const upload = multer({ storage });
 
+// Same lists as WHISPER_MODELS and TRANSCRIBE_BACKENDS in summarizer/config.py;
+// anything else is refused before a worker would try to load it
+const WHISPER_MODELS = [process.env.WHISPER_MODEL, ...(process.env.WHISPER_MODELS || "tiny,base,small").split(",")]
+  .map((name) => name && name.trim())
+  .filter(Boolean);
+const TRANSCRIBE_BACKENDS = ["whisper", "faster-whisper"];
+
+// Runs once per job, whether or not a client is still waiting on it
+const finishJob = async (job) => {
+  const result = await job.done;
+  fs.unlink(job.videoPath, () => {}); // Clean up uploaded video
+
+  if (result.success) {
+    const user=await User.findById(job.userId);
+    user.pdfs.push(result.url);
+    await user.save();
+  }
+  return result;
+};
+
 // POST /api/video/summarize
 router.post("/summarize", auth ,upload.single("video"), async (req, res) => {
     const videoPath = req.file.path;
     const pdfName = `${Date.now()}_${req.body.pdfName || "summary"}.pdf`;
-  
-    const pythonProcess = spawn("python", ["newserver.py", videoPath, pdfName]);
-  
-    let stdoutData = "";
-    let errorLog = "";
-  
-    pythonProcess.stdout.on("data", (data) => {
-      stdoutData += data.toString();
-    });
-  
-    pythonProcess.stderr.on("data", (data) => {
-      errorLog += data.toString();
-      console.error("[Python Error]", data.toString());
-    });
-  
-    pythonProcess.on("close", async (code) => {
-      fs.unlink(videoPath, () => {}); // Clean up uploaded video
-  
-      try {
-        const result = JSON.parse(stdoutData);
-        if (result.success) {
-
-          const user=await User.findById(req.user);
-          user.pdfs.push(result.url);
-          await user.save();
-
-          return res.json({ success: true, pdfURL: result.url });
-        } else {
-          return res.status(500).json({
-            success: false,
-            error: result.error || "Video summarization failed",
-            details: result.details || errorLog
-          });
-        }
-      } catch (err) {
+
+    const { model, backend } = req.body;
+    if ((model && !WHISPER_MODELS.includes(model)) || (backend && !TRANSCRIBE_BACKENDS.includes(backend))) {
+      fs.unlink(videoPath, () => {});
+      return res.status(400).json({
+        success: false,
+        error: `Unsupported model or backend, expected a model in [${WHISPER_MODELS.join(", ")}] and a backend in [${TRANSCRIBE_BACKENDS.join(", ")}]`
+      });
+    }
+
+    let job;
+    try {
+      job = jobQueue.enqueue({
+        userId: req.user,
+        videoPath,
+        pdfName,
+        // Set here, never by the client: every job a user already has queued
+        // or running lowers the next one, so one user's batch can't hold up
+        // everyone else's uploads
+        priority: -jobQueue.activeCount(req.user),
+        model,
+        backend,
+        profile: req.query.profile === "true" || req.body.profile === "true"
+      });
+    } catch (err) {
+      if (!(err instanceof QueueFullError)) throw err;
+      fs.unlink(videoPath, () => {});
+      return res.status(503).json({ success: false, error: err.message });
+    }
+
+    // Async mode answers right away; the client follows the job through the
+    // status or events endpoint instead of holding this request open.
+    if (req.query.async === "true" || req.body.async === "true") {
+      finishJob(job).catch((err) => console.error(`[Job ${job.id}] Failed to save summary:`, err.message));
+      return res.status(202).json({
+        success: true,
+        jobId: job.id,
+        statusURL: `/summarize/${job.id}`,
+        eventsURL: `/summarize/${job.id}/events`
+      });
+    }
+
+    try {
+      const result = await finishJob(job);
+      if (result.success) {
+        return res.json({ success: true, jobId: job.id, pdfURL: result.url });
+      } else {
         return res.status(500).json({
           success: false,
-          error: "Failed to parse response from Python script.",
-          details: stdoutData || errorLog || err.message
+          jobId: job.id,
+          error: result.error || "Video summarization failed",
+          details: result.details
         });
       }
-    });
+    } catch (err) {
+      return res.status(500).json({
+        success: false,
+        jobId: job.id,
+        error: "Failed to save summary.",
+        details: err.message
+      });
+    }
   });
-  
+
+// GET /summarize/:jobId
+router.get("/summarize/:jobId", auth, (req, res) => {
+  const job = jobQueue.get(req.params.jobId);
+  if (!job || job.userId !== req.user) {
+    return res.status(404).json({ success: false, error: "Job not found" });
+  }
+  return res.json({ success: true, ...jobQueue.status(job) });
+});
+
+// GET /summarize/:jobId/events
+// Server-sent events: "status" once on connect, "progress" for every update
+// from the pipeline, and "finished" with the final status before closing.
+router.get("/summarize/:jobId/events", auth, (req, res) => {
+  const job = jobQueue.get(req.params.jobId);
+  if (!job || job.userId !== req.user) {
+    return res.status(404).json({ success: false, error: "Job not found" });
+  }
+
+  res.set({
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive"
+  });
+  res.flushHeaders();
+
+  const send = (event, data) => res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+  const onProgress = (progress) => send("progress", progress);
+  const onFinished = (status) => {
+    send("finished", status);
+    res.end();
+  };
+
+  const status = jobQueue.status(job);
+  send("status", status);
+  if (job.finishedAt) return onFinished(status);
+
+  job.events.on("progress", onProgress);
+  job.events.once("finished", onFinished);
+  req.on("close", () => {
+    job.events.off("progress", onProgress);
+    job.events.off("finished", onFinished);
+  });
+});
+
 
 module.exports = router;
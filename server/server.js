@@ -2,6 +2,7 @@ const express=require("express");
 const mongoose=require("mongoose");
 const userRouter = require("./routes/user");
 const router = require("./routes/video");
+const metricsRouter = require("./routes/metrics");
 require("dotenv").config();
 
 
@@ -12,6 +13,7 @@ const app=express();
 app.use(express.json());
 app.use(userRouter);
 app.use(router);
+app.use(metricsRouter);
 
 mongoose.connect(process.env.MONGO_URI,{useNewUrlParser:true,useUnifiedTopology:true}).then(()=>{
     console.log("Database connection successful")
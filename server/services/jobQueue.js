@@ -0,0 +1,154 @@
+const crypto = require("crypto");
+const EventEmitter = require("events");
+const PythonWorker = require("./pythonWorker");
+const metrics = require("./metrics");
+
+const CONCURRENCY = Math.max(parseInt(process.env.SUMMARIZE_CONCURRENCY || "1", 10), 1);
+const MAX_QUEUED = Math.max(parseInt(process.env.SUMMARIZE_MAX_QUEUED || "20", 10), 0);
+// How long finished jobs stay visible to the status endpoint
+const FINISHED_JOB_TTL_MS = 60 * 60 * 1000;
+
+class QueueFullError extends Error {}
+
+// Bounded front door for the Python pipeline: at most CONCURRENCY jobs run at
+// once (one per resident Python worker), up to MAX_QUEUED more wait their
+// turn, and anything beyond that is refused instead of piling Whisper models
+// onto the box. Waiting jobs run highest priority first, FIFO within a priority.
+class JobQueue {
+  constructor({ concurrency = CONCURRENCY, maxQueued = MAX_QUEUED } = {}) {
+    this.maxQueued = maxQueued;
+    this.jobs = new Map();
+    this.waiting = [];
+    this.idleWorkers = [];
+
+    for (let i = 0; i < concurrency; i++) {
+      const worker = new PythonWorker();
+      worker.start(); // Load the model before the first upload arrives
+      this.idleWorkers.push(worker);
+    }
+  }
+
+  // `model` and `backend` optionally override the Python transcription defaults
+  enqueue({ userId, videoPath, pdfName, priority = 0, model, backend, profile = false }) {
+    // A job that an idle worker can take right away never waits, so it is
+    // accepted even when MAX_QUEUED is 0
+    if (!this.idleWorkers.length && this.waiting.length >= this.maxQueued) {
+      metrics.jobsRejected.inc();
+      throw new QueueFullError("Too many videos are waiting to be summarized, try again later.");
+    }
+
+    const job = {
+      id: crypto.randomUUID(),
+      userId,
+      videoPath,
+      pdfName,
+      priority,
+      model,
+      backend,
+      profile,
+      status: "queued",
+      createdAt: new Date(),
+      startedAt: null,
+      finishedAt: null,
+      stage: null,
+      // Latest update per stage; transcription and screenshots run side by side
+      progress: {},
+      result: null,
+      // Emits "progress" with each update from Python and "finished" once
+      events: new EventEmitter()
+    };
+    job.done = new Promise((resolve) => {
+      job.resolve = resolve;
+    });
+
+    // Insert behind every waiting job of the same or higher priority
+    let index = this.waiting.findIndex((other) => other.priority < priority);
+    if (index === -1) index = this.waiting.length;
+    this.waiting.splice(index, 0, job);
+    this.jobs.set(job.id, job);
+
+    this.dispatch();
+    return job;
+  }
+
+  get(id) {
+    return this.jobs.get(id);
+  }
+
+  // Jobs of one user that are waiting or running
+  activeCount(userId) {
+    let count = 0;
+    for (const job of this.jobs.values()) {
+      if (job.userId === userId && !job.finishedAt) count++;
+    }
+    return count;
+  }
+
+  position(job) {
+    return this.waiting.indexOf(job);
+  }
+
+  status(job) {
+    const status = {
+      jobId: job.id,
+      status: job.status,
+      priority: job.priority,
+      createdAt: job.createdAt,
+      startedAt: job.startedAt,
+      finishedAt: job.finishedAt,
+      stage: job.stage,
+      progress: job.progress
+    };
+    if (job.status === "queued") status.position = this.position(job);
+    if (job.status === "succeeded") status.pdfURL = job.result.url;
+    if (job.status === "failed") status.error = job.result.error;
+    if (job.result && job.result.profile) status.profile = job.result.profile;
+    return status;
+  }
+
+  dispatch() {
+    while (this.idleWorkers.length && this.waiting.length) {
+      this.run(this.idleWorkers.pop(), this.waiting.shift());
+    }
+  }
+
+  async run(worker, job) {
+    job.status = "running";
+    job.startedAt = new Date();
+
+    const result = await worker.submit({
+      videoPath: job.videoPath,
+      pdfName: job.pdfName,
+      model: job.model,
+      backend: job.backend,
+      profile: job.profile,
+      onProgress: (progress) => {
+        job.stage = progress.stage;
+        job.progress[progress.stage] = progress;
+        job.events.emit("progress", progress);
+      }
+    });
+
+    job.status = result.success ? "succeeded" : "failed";
+    job.finishedAt = new Date();
+    job.result = result;
+    metrics.recordJob(job);
+    if (result.profile) console.log(`[Job ${job.id}] Profile saved to ${result.profile}`);
+    job.resolve(result);
+    job.events.emit("finished", this.status(job));
+
+    setTimeout(() => this.jobs.delete(job.id), FINISHED_JOB_TTL_MS).unref();
+
+    this.idleWorkers.push(worker);
+    this.dispatch();
+  }
+}
+
+const jobQueue = new JobQueue();
+
+metrics.registry.gauge("summarize_jobs_queued", "Jobs waiting for a Python worker", () => jobQueue.waiting.length);
+metrics.registry.gauge("summarize_jobs_running", "Jobs currently being summarized", () =>
+  [...jobQueue.jobs.values()].filter((job) => job.status === "running").length);
+metrics.registry.gauge("summarize_workers_idle", "Python workers without a job", () => jobQueue.idleWorkers.length);
+
+module.exports = { jobQueue, QueueFullError };
@@ -0,0 +1,155 @@
+// Process-wide metrics in the Prometheus text format, served by GET /metrics.
+// Only counters, gauges and histograms are needed, so they're kept here
+// instead of pulling in a client library.
+
+const escapeLabel = (value) => String(value).replace(/\\/g, "\\\\").replace(/"/g, '\\"').replace(/\n/g, "\\n");
+
+const formatLabels = (labels) => {
+  const pairs = Object.entries(labels).map(([name, value]) => `${name}="${escapeLabel(value)}"`);
+  return pairs.length ? `{${pairs.join(",")}}` : "";
+};
+
+class Counter {
+  constructor(name, help) {
+    this.name = name;
+    this.help = help;
+    this.type = "counter";
+    this.values = new Map();
+  }
+
+  inc(labels = {}, value = 1) {
+    const key = formatLabels(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  lines() {
+    return [...this.values].map(([labels, value]) => `${this.name}${labels} ${value}`);
+  }
+}
+
+// Read at scrape time from whoever owns the value
+class Gauge {
+  constructor(name, help, collect) {
+    this.name = name;
+    this.help = help;
+    this.type = "gauge";
+    this.collect = collect;
+  }
+
+  lines() {
+    return [`${this.name} ${this.collect()}`];
+  }
+}
+
+class Histogram {
+  constructor(name, help, buckets) {
+    this.name = name;
+    this.help = help;
+    this.type = "histogram";
+    this.buckets = buckets;
+    this.series = new Map();
+  }
+
+  observe(labels = {}, value) {
+    const key = JSON.stringify(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels, counts: this.buckets.map(() => 0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    this.buckets.forEach((bound, index) => {
+      if (value <= bound) series.counts[index]++;
+    });
+    series.sum += value;
+    series.count++;
+  }
+
+  lines() {
+    const lines = [];
+    for (const { labels, counts, sum, count } of this.series.values()) {
+      this.buckets.forEach((bound, index) => {
+        lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: bound })} ${counts[index]}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: "+Inf" })} ${count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+    }
+    return lines;
+  }
+}
+
+class Registry {
+  constructor() {
+    this.metrics = [];
+  }
+
+  register(metric) {
+    this.metrics.push(metric);
+    return metric;
+  }
+
+  counter(name, help) {
+    return this.register(new Counter(name, help));
+  }
+
+  gauge(name, help, collect) {
+    return this.register(new Gauge(name, help, collect));
+  }
+
+  histogram(name, help, buckets) {
+    return this.register(new Histogram(name, help, buckets));
+  }
+
+  render() {
+    const lines = [];
+    for (const metric of this.metrics) {
+      lines.push(`# HELP ${metric.name} ${metric.help}`, `# TYPE ${metric.name} ${metric.type}`, ...metric.lines());
+    }
+    return lines.join("\n") + "\n";
+  }
+}
+
+const registry = new Registry();
+
+// Lectures run from seconds (cache hits) to well over an hour
+const SECONDS_BUCKETS = [0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200];
+// Summaries run from a few hundred KB to tens of MB
+const BYTES_BUCKETS = [1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8];
+
+const jobsTotal = registry.counter("summarize_jobs_total", "Finished summarization jobs by outcome");
+const jobsRejected = registry.counter("summarize_jobs_rejected_total", "Uploads refused because the queue was full");
+const jobWait = registry.histogram("summarize_job_wait_seconds", "Time jobs spent queued before a worker picked them up", SECONDS_BUCKETS);
+const jobDuration = registry.histogram("summarize_job_duration_seconds", "Time from a worker picking up a job to its result", SECONDS_BUCKETS);
+const stageSeconds = registry.histogram("summarize_stage_seconds", "Wall time of each pipeline stage as reported by Python", SECONDS_BUCKETS);
+const pipelineEvents = registry.counter("summarize_pipeline_events_total", "Pipeline counts reported by Python (frames sampled, OCR calls, cache hits, ...)");
+const audioSeconds = registry.counter("summarize_audio_seconds_total", "Seconds of lecture audio decoded for transcription");
+const pdfBytes = registry.histogram("summarize_pdf_bytes", "Size of each generated summary PDF", BYTES_BUCKETS);
+const framesSkipped = registry.counter("summarize_frames_skipped_total", "Sampled frames that did not become a screenshot, by reason");
+const workerExits = registry.counter("summarize_python_worker_exits_total", "Python worker processes that exited or failed to start");
+
+// Called once per finished job; `job.result.metrics` is what the Python
+// worker measured (absent if the worker died mid-job).
+const recordJob = (job) => {
+  jobsTotal.inc({ status: job.status });
+  jobWait.observe({}, (job.startedAt - job.createdAt) / 1000);
+  jobDuration.observe({}, (job.finishedAt - job.startedAt) / 1000);
+
+  const { seconds = {}, counts = {} } = job.result.metrics || {};
+  for (const [stage, value] of Object.entries(seconds)) {
+    stageSeconds.observe({ stage }, value);
+  }
+  // Quantities with a unit get their own metric; the rest are event counts
+  for (const [name, value] of Object.entries(counts)) {
+    if (name === "audio_seconds") {
+      audioSeconds.inc({}, value);
+    } else if (name === "pdf_bytes") {
+      pdfBytes.observe({}, value);
+    } else if (name.startsWith("skipped_")) {
+      framesSkipped.inc({ reason: name.slice("skipped_".length) }, value);
+    } else {
+      pipelineEvents.inc({ event: name }, value);
+    }
+  }
+};
+
+module.exports = { registry, recordJob, jobsRejected, workerExits };
@@ -0,0 +1,103 @@
+const { spawn } = require("child_process");
+const path = require("path");
+const readline = require("readline");
+const metrics = require("./metrics");
+
+const SCRIPT_PATH = path.join(__dirname, "..", "newserver.py");
+
+// Keeps one `python newserver.py --worker` process alive so the Whisper model
+// is loaded once instead of on every upload. Jobs are written as JSON lines on
+// stdin and matched to their replies by id. The Python side runs one job at a
+// time; the job queue owns a pool of these.
+class PythonWorker {
+  constructor() {
+    this.process = null;
+    this.pending = new Map();
+    this.nextId = 1;
+  }
+
+  start() {
+    if (this.process) return this.process;
+
+    const proc = spawn("python", [SCRIPT_PATH, "--worker"]);
+    this.process = proc;
+
+    readline.createInterface({ input: proc.stdout }).on("line", (line) => {
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (err) {
+        console.error("[Python Worker] Unexpected output:", line);
+        return;
+      }
+
+      if (message.event === "ready") {
+        console.log("[Python Worker] Ready");
+        return;
+      }
+
+      const job = this.pending.get(message.id);
+      if (!job) return;
+
+      if (message.event === "progress") {
+        const { id, event, ...progress } = message;
+        if (job.onProgress) job.onProgress(progress);
+        return;
+      }
+
+      this.pending.delete(message.id);
+      job.resolve(message);
+    });
+
+    proc.stderr.on("data", (data) => {
+      console.error("[Python]", data.toString());
+    });
+
+    proc.on("error", (err) => {
+      console.error("[Python Worker] Failed to start:", err.message);
+      this.stop(proc, err.message);
+    });
+
+    // EPIPE when the worker dies with a job still being written
+    proc.stdin.on("error", (err) => {
+      console.error("[Python Worker] Failed to write a job:", err.message);
+      this.stop(proc, err.message);
+    });
+
+    proc.on("close", (code) => {
+      console.error(`[Python Worker] Exited with code ${code}`);
+      this.stop(proc, `Python worker exited with code ${code}`);
+    });
+
+    return proc;
+  }
+
+  // Fail whatever was in flight; the next job respawns the worker.
+  stop(proc, details) {
+    if (this.process !== proc) return;
+    this.process = null;
+    metrics.workerExits.inc();
+
+    for (const job of this.pending.values()) {
+      job.resolve({
+        success: false,
+        error: "Video summarization failed.",
+        details
+      });
+    }
+    this.pending.clear();
+  }
+
+  // `profile` asks Python to run a sampling profiler for this job only
+  submit({ videoPath, pdfName, model, backend, profile, onProgress }) {
+    const proc = this.start();
+    const id = String(this.nextId++);
+
+    return new Promise((resolve) => {
+      this.pending.set(id, { resolve, onProgress });
+      proc.stdin.write(JSON.stringify({ id, video_path: videoPath, pdf_name: pdfName, model, backend, profile }) + "\n");
+    });
+  }
+}
+
+module.exports = PythonWorker;
@@ -0,0 +1,49 @@
+"""Lecture video summarization pipeline.
+
+    from summarizer import run_pipeline, extract_screenshots, generate_pdf_summary
+
+Names are resolved on first use, so importing the package (or a cheap part of
+it such as the result cache) does not load torch, OpenCV, Tesseract or
+reportlab. Settings live in summarizer.config and are read from the
+environment at import time.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "run_pipeline": "pipeline",
+    "transcribe_video": "pipeline",
+    "upload_pdf": "pipeline",
+    "extract_audio_from_video": "transcription",
+    "load_audio_from_video": "transcription",
+    "load_transcriber": "transcription",
+    "detect_speech_regions": "transcription",
+    "transcribe_audio_to_segments": "transcription",
+    "TRANSCRIBERS": "transcription",
+    "SampledFrame": "frames",
+    "iter_sampled_frames": "frames",
+    "detect_slide_region": "screenshots",
+    "extract_screenshots": "screenshots",
+    "extract_text_from_image": "screenshots",
+    "merge_timeline": "timeline",
+    "TimelineMerger": "timeline",
+    "PdfSummaryBuilder": "pdf",
+    "generate_pdf_summary": "pdf",
+    "JobCheckpoints": "storage",
+    "ResultCache": "storage",
+    "result_cache": "storage",
+    "JobMetrics": "events",
+    "emit_progress": "events",
+    "SamplingProfiler": "profiling",
+    "run_worker": "worker",
+    "main": "worker",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
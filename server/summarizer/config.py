@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+# --------------------------
+# Configuration
+# --------------------------
+
+# Everything here is plain data. Tesseract and Cloudinary are configured from
+# these values when the OCR and upload stages first run, so importing the
+# package stays cheap.
+
+FFMPEG_PATH = r"C:\ffmpeg-2025-02-13-git-19a2d26177-full_build\ffmpeg-2025-02-13-git-19a2d26177-full_build\bin\ffmpeg.exe"
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+CLOUDINARY_CONFIG = dict(
+    cloud_name="duoenlwuj",
+    api_key="536698638836779",
+    api_secret="_ZfLsWPirfhd08G2JKkgZrG_zTs"
+)
+
+# Caches, checkpoints and profiles live under server/.cache
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Transcription engine ("whisper" or "faster-whisper") and its default model;
+# both can be overridden per job, the model only with one of WHISPER_MODELS
+TRANSCRIBE_BACKENDS = ("whisper", "faster-whisper")
+TRANSCRIBE_BACKEND = os.environ.get("TRANSCRIBE_BACKEND", "whisper")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+WHISPER_MODELS = tuple(dict.fromkeys(
+    [WHISPER_MODEL] + [name.strip() for name in os.environ.get("WHISPER_MODELS", "tiny,base,small").split(",") if name.strip()]
+))
+FASTER_WHISPER_COMPUTE_TYPE = os.environ.get("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+
+# Feed Whisper 16 kHz mono PCM piped from ffmpeg instead of a temp WAV
+AUDIO_IN_MEMORY = os.environ.get("AUDIO_IN_MEMORY", "1") != "0"
+# whisper.audio.SAMPLE_RATE, without importing torch to read it
+AUDIO_SAMPLE_RATE = 16000
+
+# Processes transcribing chunks of long lectures in parallel (1 = off), and
+# the target chunk length in seconds
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", "1"))
+CHUNK_SECONDS = max(int(os.environ.get("TRANSCRIBE_CHUNK_SECONDS", "600")), 1)
+
+# Drop silent stretches before transcription: level relative to the loud part
+# of the recording below which audio counts as silence, and the shortest pause
+# (seconds) worth cutting
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1") != "0"
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", "-35"))
+VAD_MIN_SILENCE = float(os.environ.get("VAD_MIN_SILENCE", "2.0"))
+
+# Run the transcript and screenshot branches of run_pipeline in parallel
+PIPELINE_CONCURRENT = os.environ.get("PIPELINE_CONCURRENT", "1") != "0"
+
+# Concurrent tesseract processes used to OCR sampled frames
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+
+# Pixels of one 16x16 tile of the analysis copy (ANALYSIS_WIDTH wide) that must
+# change before a frame is OCR'd again; a short line of slide text moves 60+
+CHANGE_MIN_PIXELS = int(os.environ.get("CHANGE_MIN_PIXELS", "12"))
+
+# Content-addressed cache of finished jobs, evicted least recently used first
+CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", os.path.join(SERVER_DIR, ".cache", "summaries"))
+CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# Per-job stage outputs kept until the job succeeds, so retries resume
+CHECKPOINT_DIR = os.environ.get("SUMMARY_CHECKPOINT_DIR", os.path.join(SERVER_DIR, ".cache", "checkpoints"))
+# Seconds after its last write that an abandoned job's checkpoints are deleted
+CHECKPOINT_MAX_AGE = int(os.environ.get("SUMMARY_CHECKPOINT_MAX_AGE", 24 * 3600))
+# Parent of the per-job scratch directories (extracted audio, transcript, PDF);
+# tmpfs when the host has one with at least WORKSPACE_MIN_FREE bytes free
+WORKSPACE_MIN_FREE = int(os.environ.get("SUMMARY_WORKSPACE_MIN_FREE", 1024 ** 3))
+
+def _tmpfs_has_room(path="/dev/shm", min_free=WORKSPACE_MIN_FREE):
+    try:
+        return os.access(path, os.W_OK) and shutil.disk_usage(path).free >= min_free
+    except OSError:
+        return False
+
+WORKSPACE_ROOT = os.environ.get("SUMMARY_WORKSPACE_ROOT") or (
+    "/dev/shm" if _tmpfs_has_room() else tempfile.gettempdir()
+)
+# Bump whenever a change alters the generated PDF for the same parameters
+PIPELINE_VERSION = 3
+
+# Sampling profiler for individual jobs: on for every job with PROFILE_JOBS=1,
+# or per job through the worker's "profile" field. Output lands in PROFILE_DIR.
+PROFILE_JOBS = os.environ.get("PROFILE_JOBS", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(SERVER_DIR, ".cache", "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+
+# Width of the grayscale copy used for blur checks and slide detection, and the
+# Laplacian variance below which that copy counts as blurry. Measured on that
+# copy, sharp slides score 300+ and cross-fades blurred by 1.5 px or more
+# (benchmarks/synthetic.py) stay under 30; retune both together.
+ANALYSIS_WIDTH = int(os.environ.get("ANALYSIS_WIDTH", "640"))
+BLUR_THRESHOLD = float(os.environ.get("BLUR_THRESHOLD", "50"))
+
+# OCR only the detected slide area, re-detected when this fraction of the
+# frame changes, at OCR_TARGET_DPI for a slide SLIDE_HEIGHT_INCHES tall
+SLIDE_REGION_DETECTION = os.environ.get("SLIDE_REGION_DETECTION", "1") != "0"
+SCENE_CHANGE_THRESHOLD = float(os.environ.get("SCENE_CHANGE_THRESHOLD", "0.2"))
+OCR_TARGET_DPI = int(os.environ.get("OCR_TARGET_DPI", "144"))
+SLIDE_HEIGHT_INCHES = 7.5
+
+# Screenshots go into the PDF resampled to PDF_IMAGE_DPI at the size they are
+# drawn, re-encoded as JPEG at PDF_JPEG_QUALITY
+PDF_IMAGE_DPI = int(os.environ.get("PDF_IMAGE_DPI", "150"))
+PDF_JPEG_QUALITY = int(os.environ.get("PDF_JPEG_QUALITY", "80"))
+
+# Bytes of encoded screenshots a job keeps in memory before spilling the rest
+# to disk, under the job's checkpoint directory
+SCREENSHOT_MEMORY_BUDGET = int(os.environ.get("SCREENSHOT_MEMORY_BUDGET", 256 * 1024 ** 2))
+
+SAMPLING_METHODS = ("read", "grab", "seek", "ffmpeg", "adaptive")
+SAMPLING_METHOD = os.environ.get("SAMPLING_METHOD", "grab")
+# Bounds (seconds) for the adaptive sampler's step between samples
+ADAPTIVE_MIN_INTERVAL = float(os.environ.get("ADAPTIVE_MIN_INTERVAL", "1"))
+ADAPTIVE_MAX_INTERVAL = float(os.environ.get("ADAPTIVE_MAX_INTERVAL", "16"))
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+
+# --------------------------
+# Progress Events
+# --------------------------
+
+# Stages report structured progress through an optional `progress` callable
+# that receives a dict with at least a "stage" key. The worker forwards these
+# to Node as they happen; the CLI leaves `progress` unset.
+
+def emit_progress(progress, stage, **fields):
+    if progress is not None:
+        progress({"stage": stage, **fields})
+
+# --------------------------
+# Metrics
+# --------------------------
+
+# Wall-clock seconds per stage and event counts for one job. The worker sends
+# them back with the job result and Node exports them for Prometheus. Timers
+# with the same name add up, so a stage that runs in pieces is timed in full.
+
+class JobMetrics:
+    def __init__(self):
+        self.seconds = {}
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.seconds[name] = self.seconds.get(name, 0) + elapsed
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "seconds": {name: round(value, 4) for name, value in self.seconds.items()},
+                "counts": dict(self.counts),
+            }
@@ -0,0 +1,215 @@
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+from functools import cached_property
+
+from .config import (
+    ADAPTIVE_MAX_INTERVAL, ADAPTIVE_MIN_INTERVAL, ANALYSIS_WIDTH, CHANGE_MIN_PIXELS, FFMPEG_PATH, SAMPLING_METHOD,
+    SAMPLING_METHODS, SCENE_CHANGE_THRESHOLD
+)
+
+# --------------------------
+# Frame Sampling
+# --------------------------
+
+class SampledFrame:
+    # A decoded BGR frame plus the derived views the filters need, each built
+    # on first use and then shared: one grayscale conversion per frame feeds
+    # the change gate, slide detection, blur check and OCR alike.
+    def __init__(self, image, index, time):
+        self.image = image
+        self.index = index
+        self.time = time
+
+    @cached_property
+    def gray(self):
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def small_gray(self):
+        # No wider than ANALYSIS_WIDTH, for the change gate, blur checks and
+        # slide detection
+        gray = self.gray
+        if gray.shape[1] <= ANALYSIS_WIDTH:
+            return gray
+        height = round(gray.shape[0] * ANALYSIS_WIDTH / gray.shape[1])
+        return cv2.resize(gray, (ANALYSIS_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+    @cached_property
+    def signature(self):
+        # Tiny thumbnail compared by scene_changed()
+        return cv2.resize(self.small_gray, (128, 72), interpolation=cv2.INTER_AREA)
+
+# iter_sampled_frames() yields a SampledFrame for one frame per `interval`
+# seconds; the samplers differ only in how much of the video gets decoded
+# and converted.
+#   read   - decode every frame and keep the sampled ones (original loop)
+#   grab   - decode every frame, convert only the sampled ones to BGR
+#   seek   - jump straight to each sampled frame (cheap for long intervals)
+#   ffmpeg - let ffmpeg's fps filter pick the frames and pipe raw BGR
+#   adaptive - back off on static stretches, densify around scene changes
+
+def _sample_by_read(cap, frame_interval):
+    count = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if count % frame_interval == 0:
+            yield count, frame
+        count += 1
+
+def _sample_by_grab(cap, frame_interval):
+    count = 0
+    while cap.grab():
+        if count % frame_interval == 0:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield count, frame
+        count += 1
+
+def _sample_by_seek(cap, frame_interval):
+    count = 0
+    while True:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, count)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield count, frame
+        count += frame_interval
+
+def _sample_by_ffmpeg(video_path, interval, fps, width, height):
+    command = [
+        FFMPEG_PATH, '-v', 'error', '-i', video_path,
+        '-vf', f'fps=1/{interval}', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1'
+    ]
+    frame_size = width * height * 3
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        sample = 0
+        while True:
+            buffer = process.stdout.read(frame_size)
+            if len(buffer) < frame_size:
+                break
+            frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+            yield round(sample * interval * fps), frame
+            sample += 1
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+def frame_changed(prev_gray, gray, min_pixels=CHANGE_MIN_PIXELS, pixel_delta=25, tile=16):
+    # Compares two SampledFrame.small_gray copies: changed when any `tile` x
+    # `tile` block has at least `min_pixels` pixels that moved by more than
+    # `pixel_delta` grey levels. Compression noise stays below that level and
+    # is scattered; a new word or formula piles up in a few blocks, however
+    # small a fraction of the whole frame it is.
+    if prev_gray is None:
+        return True
+    moved = (cv2.absdiff(prev_gray, gray) > pixel_delta).astype(np.uint16)
+    height, width = moved.shape
+    moved = np.pad(moved, ((0, -height % tile), (0, -width % tile)))
+    blocks = moved.reshape(moved.shape[0] // tile, tile, moved.shape[1] // tile, tile).sum(axis=(1, 3))
+    return blocks.max() >= min_pixels
+
+def scene_changed(prev_signature, signature, threshold=SCENE_CHANGE_THRESHOLD, pixel_delta=25):
+    # Fraction of thumbnail pixels that moved by more than `pixel_delta` grey
+    # levels, for telling a new scene from edits within one
+    if prev_signature is None:
+        return True
+    changed = np.count_nonzero(cv2.absdiff(prev_signature, signature) > pixel_delta)
+    return changed / signature.size > threshold
+
+def _sample_adaptive(cap, fps, interval, min_interval, max_interval):
+    # Seek-based sampler that spends its reads where the picture changes. All
+    # positions stay on a grid of `min_interval`. While the picture is static
+    # the step doubles up to `max_interval`; when a sample differs from the
+    # previous one, the gap between them is bisected down to `min_interval` to
+    # find when the change happened, and sampling restarts densely from there.
+    def read(position):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        ret, image = cap.read()
+        return SampledFrame(image, position, position / fps) if ret else None
+
+    min_step = max(round(min_interval * fps), 1)
+    start_step = min_step * max(round(interval * fps / min_step), 1)
+    max_step = min_step * max(int(max_interval * fps) // min_step, 1)
+
+    frame = read(0)
+    if frame is None:
+        return
+    yield 0, frame
+    last_position, last_gray = 0, frame.small_gray
+    step = start_step
+
+    while True:
+        position = last_position + step
+        frame = read(position)
+        if frame is None:
+            # Past the end; close the remaining gap at full density
+            if step > min_step:
+                step = min_step
+                continue
+            break
+
+        gray = frame.small_gray
+        if frame_changed(last_gray, gray):
+            low = last_position
+            while position - low > min_step:
+                middle = low + (position - low) // min_step // 2 * min_step
+                middle_frame = read(middle)
+                if middle_frame is None:
+                    break
+                middle_gray = middle_frame.small_gray
+                if frame_changed(last_gray, middle_gray):
+                    position, frame, gray = middle, middle_frame, middle_gray
+                else:
+                    low = middle
+            step = min_step
+        else:
+            step = min(step * 2, max_step)
+
+        yield position, frame
+        last_position, last_gray = position, gray
+
+def iter_sampled_frames(video_path, interval=2, method=SAMPLING_METHOD,
+                        min_interval=ADAPTIVE_MIN_INTERVAL, max_interval=ADAPTIVE_MAX_INTERVAL):
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method '{method}', expected one of {SAMPLING_METHODS}")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print("Cannot open video.", file=sys.stderr)
+        return
+
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    frame_interval = max(interval * fps, 1)
+    print(f"[SCREENSHOT] FPS: {fps}, Interval: {interval}s, Sampling: {method}", file=sys.stderr)
+
+    try:
+        if method == "ffmpeg":
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+            frames = _sample_by_ffmpeg(video_path, interval, fps, width, height)
+        elif method == "adaptive":
+            frames = _sample_adaptive(cap, fps, interval, min(min_interval, interval), max(max_interval, interval))
+        elif method == "seek":
+            frames = _sample_by_seek(cap, frame_interval)
+        elif method == "grab":
+            frames = _sample_by_grab(cap, frame_interval)
+        else:
+            frames = _sample_by_read(cap, frame_interval)
+
+        for count, frame in frames:
+            # The adaptive sampler already wraps frames to reuse their grayscale copies
+            if not isinstance(frame, SampledFrame):
+                frame = SampledFrame(frame, count, count / fps)
+            yield frame
+    finally:
+        cap.release()
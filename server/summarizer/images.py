@@ -0,0 +1,22 @@
+import io
+import shutil
+
+# --------------------------
+# Screenshot Images
+# --------------------------
+
+# Saved screenshots are JPEG bytes kept in memory for the PDF writer, or, once
+# a job's SCREENSHOT_MEMORY_BUDGET is used up, the path of a spilled file.
+
+def screenshot_name(timestamp_sec):
+    return f'screenshot_{timestamp_sec:.2f}s.jpg'
+
+def open_image(image):
+    return io.BytesIO(image) if isinstance(image, bytes) else image
+
+def write_image(image, path):
+    if isinstance(image, bytes):
+        with open(path, 'wb') as file:
+            file.write(image)
+    else:
+        shutil.copyfile(image, path)
@@ -0,0 +1,121 @@
+import hashlib
+import io
+import re
+import sys
+
+from PIL import Image
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .config import PDF_IMAGE_DPI, PDF_JPEG_QUALITY
+from .images import open_image
+
+# --------------------------
+# Generate PDF
+# --------------------------
+
+def prepare_image(image, max_width, max_height, dpi=PDF_IMAGE_DPI, quality=PDF_JPEG_QUALITY):
+    # Fit the image into max_width x max_height points and resample it to
+    # `dpi` at that size; a 1080p frame drawn a third of a page high needs
+    # about a quarter of its pixels. Returns (JPEG bytes, width, height in points).
+    with Image.open(open_image(image)) as img:
+        iw, ih = img.size
+        scale = min(max_width / iw, max_height / ih)
+        width, height = iw * scale, ih * scale
+        size = (min(max(round(width / 72 * dpi), 1), iw), min(max(round(height / 72 * dpi), 1), ih))
+
+        # JPEG decoding can skip straight to 1/2, 1/4 or 1/8 scale
+        img.draft("RGB", size)
+        img = img.convert("RGB")
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), width, height
+
+class PdfSummaryBuilder:
+    # Lays out timeline entries one at a time as they arrive; close() writes
+    # the file. Entries must come in time order.
+    def __init__(self, output_file, pagesize=letter, margin=50, text_font_size=11):
+        self.output_file = output_file
+        self.c = canvas.Canvas(output_file, pagesize=pagesize)
+        self.width, self.height = pagesize
+        self.margin = margin
+        self.text_font_size = text_font_size
+        self.image_max_width = self.width - 2 * margin
+        self.image_max_height = self.height / 3
+        self.entries = 0
+        # Prepared JPEGs by hash of the source, so a screenshot that comes up
+        # again is resampled once and embedded as one XObject: reportlab reuses
+        # an image object when it is handed identical image data. Only the
+        # small JPEG is kept; an ImageReader would hold on to decoded pixels.
+        self.images = {}
+
+        self.c.setFont("Helvetica", text_font_size)
+        self.y = self.height - margin
+        self.c.drawString(margin, self.y, "Video Summary")
+        self.y -= 20
+
+    def new_page(self):
+        self.c.showPage()
+        self.c.setFont("Helvetica", self.text_font_size)
+        self.y = self.height - self.margin
+
+    def add(self, entry):
+        c, margin = self.c, self.margin
+        self.entries += 1
+        if self.y < 100:
+            self.new_page()
+
+        if entry["type"] == "transcript":
+            wrapped = re.findall(r'.{1,100}(?:\s+|$)', entry["content"])
+            line = ''
+            for word in wrapped:
+                if c.stringWidth(line + word.strip(), "Helvetica", self.text_font_size) < (self.width - 2 * margin):
+                    line += word.strip() + ' '
+                else:
+                    c.drawString(margin, self.y, line.strip())
+                    self.y -= 14
+                    line = word.strip() + ' '
+                    if self.y < 100:
+                        self.new_page()
+            if line:
+                c.drawString(margin, self.y, line.strip())
+                self.y -= 14
+
+        elif entry["type"] == "screenshot":
+            try:
+                img, img_width, img_height = self.image(entry["content"])
+
+                if self.y - img_height < 50:
+                    self.new_page()
+
+                c.drawImage(img, margin, self.y - img_height, width=img_width, height=img_height)
+                self.y -= img_height + 20
+            except Exception:
+                c.drawString(margin, self.y, f"[Error loading screenshot at {entry['time']:.2f}s]")
+                self.y -= 20
+
+    def image(self, content):
+        if isinstance(content, bytes):
+            key = hashlib.sha1(content).hexdigest()
+        else:
+            with open(content, 'rb') as file:
+                key = hashlib.sha1(file.read()).hexdigest()
+
+        if key not in self.images:
+            self.images[key] = prepare_image(content, self.image_max_width, self.image_max_height)
+        data, width, height = self.images[key]
+        return ImageReader(io.BytesIO(data)), width, height
+
+    def close(self):
+        self.c.save()
+        print(f"[PDF] Generated: {self.output_file} ({self.entries} entries)", file=sys.stderr)
+
+def generate_pdf_summary(timeline, output_file):
+    pdf = PdfSummaryBuilder(output_file)
+    for entry in timeline:
+        pdf.add(entry)
+    pdf.close()
@@ -0,0 +1,267 @@
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import (
+    AUDIO_IN_MEMORY, AUDIO_SAMPLE_RATE, CLOUDINARY_CONFIG, PIPELINE_CONCURRENT, TRANSCRIBE_BACKEND,
+    TRANSCRIBE_BACKENDS, WHISPER_MODEL, WHISPER_MODELS, WORKSPACE_ROOT
+)
+from .events import JobMetrics, emit_progress
+from .storage import JobCheckpoints, evict_stale_checkpoints, pipeline_params, result_cache, segment_record, video_cache_key
+from .timeline import TimelineMerger, screenshot_entry, transcript_entry
+
+# --------------------------
+# Pipeline Entry Point
+# --------------------------
+
+# The stage modules pull in torch, OpenCV, Tesseract and reportlab, so they
+# are imported inside the functions that run them. Validation errors, cache
+# hits and resumed jobs never load what they don't use.
+
+def transcribe_video(video_path, audio_path, transcript_txt, model_name=WHISPER_MODEL, backend=TRANSCRIBE_BACKEND,
+                     in_memory=AUDIO_IN_MEMORY, on_segments=None, metrics=None, progress=None):
+    # Extract audio from video, then transcribe audio to segments
+    from .transcription import extract_audio_from_video, load_audio_from_video, transcribe_audio_to_segments
+
+    metrics = metrics or JobMetrics()
+    emit_progress(progress, "transcribe", status="extracting_audio")
+    with metrics.timer("extract_audio"):
+        if in_memory:
+            audio = load_audio_from_video(video_path)
+        else:
+            extract_audio_from_video(video_path, audio_path)
+            audio = audio_path
+
+    if in_memory:
+        metrics.count("audio_seconds", len(audio) / AUDIO_SAMPLE_RATE)
+        emit_progress(progress, "transcribe", status="transcribing", audio_seconds=len(audio) / AUDIO_SAMPLE_RATE)
+    else:
+        emit_progress(progress, "transcribe", status="transcribing")
+    with metrics.timer("transcribe"):
+        segments = transcribe_audio_to_segments(audio, transcript_txt, model_name, backend, on_segments=on_segments,
+                                                progress=progress)
+    metrics.count("segments", len(segments))
+    return segments
+
+# Both branches feed the PDF through `timeline` (a TimelineMerger, or None
+# when the PDF is already there) as their results come in.
+
+def transcript_stage(video_path, audio_path, transcript_txt, checkpoints, model_name, backend, timeline=None,
+                     metrics=None, progress=None):
+    segments = checkpoints.load("segments")
+    if segments is not None:
+        print(f"[CHECKPOINT] Reusing {len(segments)} transcript segments", file=sys.stderr)
+        emit_progress(progress, "transcribe", status="resumed", segments=len(segments))
+        if timeline:
+            timeline.finish("transcript", [transcript_entry(seg) for seg in segments])
+        return segments
+
+    on_segments = None
+    if timeline:
+        def on_segments(new_segments, until):
+            timeline.push("transcript", [transcript_entry(seg) for seg in new_segments], until)
+
+    segments = transcribe_video(video_path, audio_path, transcript_txt, model_name, backend,
+                                on_segments=on_segments, metrics=metrics, progress=progress)
+    if timeline:
+        timeline.finish("transcript")
+    segments = [segment_record(seg) for seg in segments]
+    checkpoints.save("segments", segments)
+    emit_progress(progress, "transcribe", status="done", segments=len(segments))
+    return segments
+
+def screenshot_stage(video_path, spill_dir, checkpoints, timeline=None, metrics=None, progress=None):
+    screenshots = checkpoints.load_screenshots()
+    if screenshots is not None:
+        print(f"[CHECKPOINT] Reusing {len(screenshots)} screenshots", file=sys.stderr)
+        emit_progress(progress, "screenshots", status="resumed", screenshots=len(screenshots))
+        if timeline:
+            timeline.finish("screenshots", [screenshot_entry(shot) for shot in screenshots])
+        return screenshots
+
+    from .screenshots import extract_screenshots
+
+    on_screenshots = None
+    if timeline:
+        def on_screenshots(shots, until):
+            timeline.push("screenshots", [screenshot_entry(shot) for shot in shots], until)
+
+    metrics = metrics or JobMetrics()
+    with metrics.timer("screenshots"):
+        screenshots = extract_screenshots(video_path, output_dir=spill_dir, interval=2,
+                                          on_screenshots=on_screenshots, metrics=metrics, progress=progress)
+    checkpoints.save_screenshots(screenshots)
+    if timeline:
+        timeline.finish("screenshots")
+    return screenshots
+
+class PdfLayout:
+    # Lays merged timeline entries out on a thread of its own. The stages only
+    # hand entries over, so their timers measure transcription and OCR alone,
+    # never PDF layout or a wait for the other stage's layout.
+    def __init__(self, pdf, metrics):
+        self.pdf = pdf
+        self.metrics = metrics
+        self.entries = queue.SimpleQueue()
+        self.abandoned = False
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-layout")
+        self.future = self.pool.submit(self._run)
+
+    def add(self, entry):
+        self.entries.put(entry)
+
+    def _run(self):
+        while True:
+            entry = self.entries.get()
+            if entry is None or self.abandoned:
+                return
+            with self.metrics.timer("pdf"):
+                self.pdf.add(entry)
+
+    def finish(self):
+        # Waits for the backlog and re-raises anything layout failed with
+        self.entries.put(None)
+        self.future.result()
+        self.pool.shutdown()
+
+    def abandon(self):
+        self.abandoned = True
+        self.entries.put(None)
+        self.pool.shutdown()
+
+_cloudinary_configured = False
+
+def upload_pdf(pdf_path):
+    global _cloudinary_configured
+    import cloudinary
+    import cloudinary.uploader
+
+    if not _cloudinary_configured:
+        cloudinary.config(**CLOUDINARY_CONFIG)
+        _cloudinary_configured = True
+    return cloudinary.uploader.upload(pdf_path, resource_type="auto")["secure_url"]
+
+# Returns the Cloudinary URL of the PDF, or with upload=False writes the PDF
+# to `pdf_name` and returns that path.
+
+def run_pipeline(video_path, pdf_name, concurrent=PIPELINE_CONCURRENT, use_cache=True, rebuild_pdf=False,
+                 job_id=None, model_name=WHISPER_MODEL, backend=TRANSCRIBE_BACKEND, upload=True, metrics=None,
+                 progress=None):
+    if backend not in TRANSCRIBE_BACKENDS:
+        raise ValueError(f"Unknown transcription backend '{backend}', expected one of {TRANSCRIBE_BACKENDS}")
+    if model_name not in WHISPER_MODELS:
+        raise ValueError(f"Unknown transcription model '{model_name}', expected one of {WHISPER_MODELS}")
+    metrics = metrics or JobMetrics()
+
+    emit_progress(progress, "fingerprint")
+    with metrics.timer("fingerprint"):
+        fingerprint = video_cache_key(video_path, pipeline_params(model_name=model_name, backend=backend))
+        cached = result_cache.get(fingerprint) if use_cache else None
+    metrics.count("cache_hit" if cached else "cache_miss")
+    if cached and cached["url"] and upload and not rebuild_pdf:
+        print(f"[CACHE] Hit {fingerprint[:12]}, reusing {cached['url']}", file=sys.stderr)
+        emit_progress(progress, "cache", status="hit")
+        return cached["url"]
+
+    # Every job works in its own scratch directory (on tmpfs when available),
+    # so several jobs can run side by side without clobbering each other.
+    workspace = tempfile.mkdtemp(prefix="job-", dir=WORKSPACE_ROOT)
+    audio_path = os.path.join(workspace, "audio.wav")
+    transcript_txt = os.path.join(workspace, "transcript.txt")
+    pdf_path = os.path.join(workspace, os.path.basename(pdf_name))
+
+    # Without an explicit id, a retry of the same video and parameters resumes
+    # the previous attempt's checkpoints. If another job is working on the
+    # same video right now, this one gets a private set instead, so neither
+    # sees the other's half-written checkpoints or has them cleared mid-job.
+    evict_stale_checkpoints()
+    checkpoints = JobCheckpoints(job_id or fingerprint, fingerprint)
+    if not checkpoints.acquire():
+        print(f"[CHECKPOINT] {fingerprint[:12]} is in use by another job, not resuming", file=sys.stderr)
+        checkpoints = JobCheckpoints(f"{job_id or fingerprint}-{uuid.uuid4().hex[:8]}", fingerprint)
+        checkpoints.acquire()
+    # Screenshots past SCREENSHOT_MEMORY_BUDGET spill next to the checkpoints
+    # rather than into the workspace, which is usually RAM-backed tmpfs.
+    spill_dir = checkpoints.path("spill")
+    succeeded = False
+    layout = None
+
+    try:
+        # Pages are laid out while transcription and OCR are still running,
+        # instead of merging and rendering everything once both are done.
+        pdf = None
+        if checkpoints.load("pdf") and checkpoints.restore_file("summary.pdf", pdf_path):
+            print("[CHECKPOINT] Reusing generated PDF", file=sys.stderr)
+        else:
+            from .pdf import PdfSummaryBuilder
+            pdf = PdfSummaryBuilder(pdf_path)
+
+        layout = PdfLayout(pdf, metrics) if pdf else None
+        timeline = TimelineMerger(layout.add) if layout else None
+
+        if cached:
+            print(f"[CACHE] Hit {fingerprint[:12]}, rebuilding PDF from cached results", file=sys.stderr)
+            segments = cached["segments"]
+            screenshots = cached["screenshots"]
+            if timeline:
+                timeline.finish("transcript", [transcript_entry(seg) for seg in segments])
+                timeline.finish("screenshots", [screenshot_entry(shot) for shot in screenshots])
+        elif concurrent:
+            # The audio/Whisper and OpenCV/Tesseract branches share nothing until
+            # the merge. Torch, OpenCV and the tesseract subprocess all release
+            # the GIL, so threads overlap them and keep the resident model usable.
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                segments_future = pool.submit(transcript_stage, video_path, audio_path, transcript_txt, checkpoints,
+                                              model_name, backend, timeline, metrics, progress)
+                screenshots_future = pool.submit(screenshot_stage, video_path, spill_dir, checkpoints,
+                                                 timeline, metrics, progress)
+                segments = segments_future.result()
+                screenshots = screenshots_future.result()
+        else:
+            segments = transcript_stage(video_path, audio_path, transcript_txt, checkpoints, model_name, backend,
+                                        timeline, metrics, progress)
+            screenshots = screenshot_stage(video_path, spill_dir, checkpoints, timeline, metrics, progress)
+
+        if pdf:
+            emit_progress(progress, "pdf", segments=len(segments), screenshots=len(screenshots))
+            layout.finish()
+            with metrics.timer("pdf"):
+                pdf.close()
+            checkpoints.store_file(pdf_path, "summary.pdf")
+            checkpoints.save("pdf", True)
+
+        metrics.count("pdf_bytes", os.path.getsize(pdf_path))
+        if upload:
+            # Upload PDF to Cloudinary
+            emit_progress(progress, "upload")
+            with metrics.timer("upload"):
+                result_url = upload_pdf(pdf_path)
+        else:
+            shutil.copyfile(pdf_path, pdf_name)
+            result_url = pdf_name
+
+        if use_cache and not cached:
+            result_cache.put(fingerprint, result_url if upload else None, segments, screenshots)
+        succeeded = True
+
+    finally:
+        if layout:
+            layout.abandon()
+        # Clean up the workspace; checkpoints only once the job has gone
+        # through so a retry can resume from them.
+        try:
+            if succeeded:
+                checkpoints.clear()
+            else:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+                checkpoints.release()
+            shutil.rmtree(workspace)
+        except Exception as cleanup_error:
+            print(f"[CLEANUP ERROR] Failed to delete temporary files: {cleanup_error}", file=sys.stderr)
+
+    return result_url
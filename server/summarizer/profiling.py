@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+from contextlib import nullcontext
+
+from .config import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_JOBS
+
+# --------------------------
+# Profiling
+# --------------------------
+
+# Wall-clock sampling profiler: a background thread snapshots every thread's
+# Python stack each `interval` seconds while the job runs, so the pool
+# threads doing transcription and OCR show up too. Nothing runs unless a
+# job asks for it. On exit it writes
+#   stacks.collapsed  "thread;outer;...;inner count" lines for flamegraph.pl,
+#                     speedscope or inferno
+#   hotspots.json     per-function self and total time, busiest first
+# Time spent in native code (torch, OpenCV) is charged to the Python frame
+# that called it; subprocesses and the chunk transcription processes are
+# not sampled.
+
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+class SamplingProfiler:
+    def __init__(self, output_dir, interval=PROFILE_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.stacks = Counter()
+        self.ticks = 0
+        self.started = None
+        self.elapsed = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        try:
+            self.save()
+        except OSError as e:
+            print(f"[PROFILE] Could not write profile to {self.output_dir}: {e}", file=sys.stderr)
+        return False
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.ticks += 1
+
+    def hotspots(self, limit=50):
+        # Samples where a thread was only waiting on a lock or queue are left
+        # out, otherwise idle pool threads would top the list
+        seconds_per_sample = self.elapsed / max(self.ticks, 1)
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or frames[-1].split("(")[-1].startswith(IDLE_MODULES):
+                continue
+            own[frames[-1]] += count
+            for function in set(frames):
+                total[function] += count
+
+        busiest = sorted(total, key=lambda function: (own[function], total[function]), reverse=True)
+        return [
+            {"function": function, "self_seconds": round(own[function] * seconds_per_sample, 3),
+             "total_seconds": round(total[function] * seconds_per_sample, 3)}
+            for function in busiest[:limit]
+        ]
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, "stacks.collapsed"), 'w', encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        with open(os.path.join(self.output_dir, "hotspots.json"), 'w', encoding="utf-8") as file:
+            json.dump({
+                "seconds": round(self.elapsed, 3),
+                "interval": self.interval,
+                "ticks": self.ticks,
+                "hotspots": self.hotspots(),
+            }, file, indent=2)
+        print(f"[PROFILE] Saved to {self.output_dir}", file=sys.stderr)
+
+def profile_field(profiler):
+    # Where a job's profile went, for the worker reply
+    return {"profile": profiler.output_dir} if isinstance(profiler, SamplingProfiler) else {}
+
+def job_profiler(pdf_name, enabled=PROFILE_JOBS):
+    if not enabled:
+        return nullcontext()
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.path.splitext(os.path.basename(pdf_name))[0]}"
+    return SamplingProfiler(os.path.join(PROFILE_DIR, name))
@@ -0,0 +1,293 @@
+import os
+import re
+import sys
+import zlib
+
+import cv2
+import numpy as np
+import pytesseract
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from Levenshtein import ratio as levenshtein_ratio
+
+from .config import (
+    BLUR_THRESHOLD, OCR_TARGET_DPI, OCR_WORKERS, SAMPLING_METHOD,
+    SCREENSHOT_MEMORY_BUDGET, SLIDE_HEIGHT_INCHES, SLIDE_REGION_DETECTION, TESSERACT_CMD
+)
+from .events import JobMetrics, emit_progress
+from .frames import frame_changed, iter_sampled_frames, scene_changed
+from .images import screenshot_name, write_image
+
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+# --------------------------
+# Screenshot Extraction & OCR
+# --------------------------
+
+# The change gate, blur checks and slide detection look at
+# SampledFrame.small_gray; OCR looks only at the detected slide region of
+# SampledFrame.gray. Regions are (x0, y0, x1, y1) fractions of the frame so
+# they apply at any resolution.
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+
+def crop_region(image, region):
+    height, width = image.shape[:2]
+    x0, y0, x1, y1 = region
+    return image[round(y0 * height):round(y1 * height), round(x0 * width):round(x1 * width)]
+
+def detect_slide_region(gray, dark_level=24, min_fraction=0.1):
+    # Trim black letterbox/pillarbox bars, then prefer the largest bright block
+    # inside (the slide) over webcam overlays and dark margins. Bars are
+    # symmetric, so each axis only loses the smaller of its two dark margins;
+    # that keeps the empty lower part of a dark-themed slide, where later
+    # bullets may appear. Dark slides don't form a bright block and keep the
+    # trimmed frame.
+    height, width = gray.shape
+    lit = gray > dark_level
+    rows = np.flatnonzero(lit.mean(axis=1) > 0.02)
+    cols = np.flatnonzero(lit.mean(axis=0) > 0.02)
+    if not len(rows) or not len(cols):
+        return FULL_FRAME
+    y_margin = min(int(rows[0]), height - 1 - int(rows[-1]))
+    x_margin = min(int(cols[0]), width - 1 - int(cols[-1]))
+    y0, y1, x0, x1 = y_margin, height - y_margin, x_margin, width - x_margin
+
+    box = gray[y0:y1, x0:x1]
+    _, bright = cv2.threshold(box, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    bright = cv2.morphologyEx(bright, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    contours, _ = cv2.findContours(bright, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        bx, by, bw, bh = cv2.boundingRect(max(contours, key=cv2.contourArea))
+        if bw * bh >= 0.4 * box.size:
+            x0, y0, x1, y1 = x0 + bx, y0 + by, x0 + bx + bw, y0 + by + bh
+
+    if (x1 - x0) * (y1 - y0) < min_fraction * width * height:
+        return FULL_FRAME
+    return (x0 / width, y0 / height, x1 / width, y1 / height)
+
+def content_outside_region(gray, region, dark_level=24, max_fraction=0.001):
+    # New content (say, a bullet revealed below a cropped dark slide) that
+    # lands outside the current region means the region must be re-detected
+    if region == FULL_FRAME:
+        return False
+    outside = gray > dark_level
+    x0, y0, x1, y1 = region
+    height, width = gray.shape
+    outside[round(y0 * height):round(y1 * height), round(x0 * width):round(x1 * width)] = False
+    return np.count_nonzero(outside) > max_fraction * outside.size
+
+def is_blurry(gray, threshold=BLUR_THRESHOLD):
+    return cv2.Laplacian(gray, cv2.CV_64F).var() < threshold
+
+def extract_text_from_image(frame, region=FULL_FRAME, dpi=OCR_TARGET_DPI):
+    gray = crop_region(frame.gray, region)
+    # Treat the slide as SLIDE_HEIGHT_INCHES tall: shrink anything above the
+    # target DPI and tell tesseract the resolution instead of letting it guess.
+    target_height = round(SLIDE_HEIGHT_INCHES * dpi)
+    if gray.shape[0] > target_height:
+        width = round(gray.shape[1] * target_height / gray.shape[0])
+        gray = cv2.resize(gray, (width, target_height), interpolation=cv2.INTER_AREA)
+    actual_dpi = max(round(gray.shape[0] / SLIDE_HEIGHT_INCHES), 70)
+    return pytesseract.image_to_string(gray, config=f"--dpi {actual_dpi}").strip()
+
+def clean_text(text):
+    return re.sub(r'\W+', ' ', text).lower().strip()
+
+def significant_change(prev_text, curr_text, line_change_ratio=0.5):
+    prev_lines = [line.strip() for line in prev_text.splitlines() if line.strip()]
+    curr_lines = [line.strip() for line in curr_text.splitlines() if line.strip()]
+    
+    if not prev_lines:
+        return True
+
+    new_lines = [line for line in curr_lines if line not in prev_lines]
+    added_ratio = len(new_lines) / max(len(prev_lines), 1)
+    return added_ratio > line_change_ratio
+
+class TextSimilarityIndex:
+    # Answers "is any saved text above `threshold` Levenshtein ratio?" exactly
+    # like the linear scan, without running Levenshtein on every saved text.
+    # MinHash over character trigrams with LSH banding finds most repeats
+    # after a handful of exact checks. Banding can still miss a pair whose
+    # edits are scattered enough to break most trigrams, so a query without a
+    # banded match falls back to every saved text that character counts don't
+    # rule out (see _count_bound); benchmarks/similarity.py checks the two
+    # agree on pairs around the threshold.
+    _PRIME = (1 << 31) - 1
+    _COUNT_BINS = 64
+
+    def __init__(self, threshold=0.85, shingle_size=3, bands=32, rows=2, seed=1):
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+        self._a = rng.integers(1, self._PRIME, size=bands * rows, dtype=np.uint64)
+        self._b = rng.integers(0, self._PRIME, size=bands * rows, dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._texts = []
+        self._counts = np.zeros((16, self._COUNT_BINS), dtype=np.int32)
+        self._lengths = np.zeros(16, dtype=np.int32)
+
+    def _signature(self, text):
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(sh.encode()) % self._PRIME for sh in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # Both factors are below 2**31, so the products fit in uint64.
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % self._PRIME
+        signature = permuted.min(axis=1)
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _char_counts(self, text):
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32) % self._COUNT_BINS
+        return np.bincount(codes, minlength=self._COUNT_BINS)
+
+    def _count_bound(self, text):
+        # The ratio is 1 - indels / (len(a) + len(b)), and every insertion or
+        # deletion changes one character count by one, so the L1 distance of
+        # the counts caps the ratio of `text` to each saved text from above.
+        n = len(self._texts)
+        distance = np.abs(self._counts[:n] - self._char_counts(text)).sum(axis=1)
+        return 1 - distance / np.maximum(self._lengths[:n] + len(text), 1)
+
+    def add(self, text):
+        index = len(self._texts)
+        self._texts.append(text)
+        if index == len(self._lengths):
+            self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+            self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+        self._counts[index] = self._char_counts(text)
+        self._lengths[index] = len(text)
+        for band, key in enumerate(self._signature(text)):
+            self._buckets[band].setdefault(key, []).append(index)
+
+    def contains_similar(self, text):
+        if not self._texts:
+            return False
+        bound = self._count_bound(text)
+        checked = set()
+        for band, key in enumerate(self._signature(text)):
+            for i in self._buckets[band].get(key, ()):
+                if i in checked or bound[i] <= self.threshold:
+                    continue
+                checked.add(i)
+                if levenshtein_ratio(self._texts[i], text) > self.threshold:
+                    return True
+        return any(
+            levenshtein_ratio(self._texts[i], text) > self.threshold
+            for i in np.flatnonzero(bound > self.threshold) if i not in checked
+        )
+
+    def __len__(self):
+        return len(self._texts)
+
+def extract_screenshots(video_path, output_dir='screenshots', interval=2,
+                        sampling_method=SAMPLING_METHOD, ocr_workers=OCR_WORKERS,
+                        slide_regions=SLIDE_REGION_DETECTION, memory_budget=SCREENSHOT_MEMORY_BUDGET,
+                        on_screenshots=None, metrics=None, progress=None):
+    # `on_screenshots(shots, until)` gets the screenshots saved so far in time
+    # order, each time every frame up to `until` seconds has been looked at.
+    metrics = metrics or JobMetrics()
+    held_bytes = 0
+    prev_text = ""
+    saved_texts = TextSimilarityIndex(threshold=0.85)
+    data = []
+    frames_sampled, frames_ocr = 0, 0
+
+    def select(frame, curr_text):
+        nonlocal prev_text, held_bytes
+        timestamp_sec = frame.time
+
+        if not curr_text:
+            print(f" [{timestamp_sec:.2f}s] No text, skipping", file=sys.stderr)
+            metrics.count("skipped_no_text")
+            return
+
+        cleaned = clean_text(curr_text)
+        if saved_texts.contains_similar(cleaned):
+            print(f" [{timestamp_sec:.2f}s] Repeated, skipping", file=sys.stderr)
+            metrics.count("skipped_repeated")
+            return
+
+        if significant_change(prev_text, curr_text):
+            image = cv2.imencode('.jpg', frame.image)[1].tobytes()
+            if held_bytes + len(image) > memory_budget:
+                os.makedirs(output_dir, exist_ok=True)
+                filename = os.path.join(output_dir, screenshot_name(timestamp_sec))
+                write_image(image, filename)
+                image = filename
+                metrics.count("screenshots_spilled")
+            else:
+                held_bytes += len(image)
+            data.append({
+                "time": timestamp_sec,
+                "image": image,
+                "text": curr_text
+            })
+            prev_text = curr_text
+            saved_texts.add(cleaned)
+            where = "memory" if isinstance(image, bytes) else image
+            print(f" [{timestamp_sec:.2f}s] Saved: {screenshot_name(timestamp_sec)} ({where})", file=sys.stderr)
+            metrics.count("screenshots")
+        else:
+            print(f" [{timestamp_sec:.2f}s] Slight change, skipping", file=sys.stderr)
+            metrics.count("skipped_slight_change")
+
+    def consume(frame, ocr_future):
+        saved = len(data)
+        select(frame, ocr_future.result())
+        if on_screenshots:
+            on_screenshots(data[saved:], frame.time)
+
+    # OCR runs on a bounded pool while the decoder keeps sampling. Results are
+    # consumed strictly in submission (= timestamp) order so the repeat and
+    # significant_change checks see frames in sequence, and at most
+    # 2 * ocr_workers frames are held in memory waiting for OCR.
+    pending = deque()
+    max_pending = 2 * ocr_workers
+    ocr_gray = None
+    region, region_signature = FULL_FRAME, None
+
+    with ThreadPoolExecutor(max_workers=ocr_workers) as ocr_pool:
+        for frame in iter_sampled_frames(video_path, interval, sampling_method):
+            print(f"\n[FRAME] {frame.index} ({frame.time:.2f}s)", file=sys.stderr)
+            frames_sampled += 1
+            metrics.count("frames_sampled")
+            emit_progress(progress, "screenshots", video_time=frame.time, frames_sampled=frames_sampled,
+                          frames_ocr=frames_ocr, screenshots=len(data))
+
+            # Lectures sit on one slide for minutes; a frame that looks the same
+            # as the last one sent to OCR would only produce the same text.
+            if not frame_changed(ocr_gray, frame.small_gray):
+                print(" Unchanged, skipping", file=sys.stderr)
+                metrics.count("skipped_unchanged")
+                continue
+
+            # The slide area only moves when the scene changes substantially or
+            # something appears outside of it
+            if slide_regions and (scene_changed(region_signature, frame.signature)
+                                  or content_outside_region(frame.small_gray, region)):
+                region, region_signature = detect_slide_region(frame.small_gray), frame.signature
+
+            if is_blurry(crop_region(frame.small_gray, region)):
+                print(" Blurry, skipping", file=sys.stderr)
+                metrics.count("skipped_blurry")
+                continue
+
+            ocr_gray = frame.small_gray
+            frames_ocr += 1
+            metrics.count("frames_ocr")
+            pending.append((frame, ocr_pool.submit(extract_text_from_image, frame, region)))
+
+            while pending and (len(pending) >= max_pending or pending[0][1].done()):
+                consume(*pending.popleft())
+
+        while pending:
+            consume(*pending.popleft())
+
+    print(f"\n[SCREENSHOT] Saved {len(data)} screenshots", file=sys.stderr)
+    emit_progress(progress, "screenshots", status="done", frames_sampled=frames_sampled,
+                  frames_ocr=frames_ocr, screenshots=len(data))
+    return data
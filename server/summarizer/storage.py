@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import msvcrt
+except ImportError:
+    import fcntl
+    msvcrt = None
+
+from .config import (
+    ADAPTIVE_MAX_INTERVAL, ADAPTIVE_MIN_INTERVAL, ANALYSIS_WIDTH, AUDIO_IN_MEMORY, BLUR_THRESHOLD, CACHE_DIR,
+    CACHE_MAX_BYTES, CHANGE_MIN_PIXELS, CHECKPOINT_DIR, CHECKPOINT_MAX_AGE, CHUNK_SECONDS, FASTER_WHISPER_COMPUTE_TYPE,
+    OCR_TARGET_DPI, PDF_IMAGE_DPI, PDF_JPEG_QUALITY, PIPELINE_VERSION, SAMPLING_METHOD, SCENE_CHANGE_THRESHOLD,
+    SLIDE_REGION_DETECTION, TRANSCRIBE_BACKEND, TRANSCRIBE_WORKERS, VAD_ENABLED, VAD_MIN_SILENCE, VAD_THRESHOLD_DB,
+    WHISPER_MODEL
+)
+from .images import screenshot_name, write_image
+
+# --------------------------
+# Result Cache
+# --------------------------
+
+# Finished jobs are stored under a key derived from the video bytes and every
+# parameter that can change the output, so a re-upload of the same lecture
+# returns the existing PDF URL (or rebuilds the PDF from the stored segments
+# and screenshots) without audio extraction, Whisper or OCR.
+
+def pipeline_params(interval=2, model_name=WHISPER_MODEL, backend=TRANSCRIBE_BACKEND, sampling_method=SAMPLING_METHOD):
+    return {
+        "version": PIPELINE_VERSION,
+        "interval": interval,
+        "model": model_name,
+        "backend": backend,
+        "compute_type": FASTER_WHISPER_COMPUTE_TYPE if backend == "faster-whisper" else None,
+        "audio_in_memory": AUDIO_IN_MEMORY,
+        "vad": [VAD_ENABLED, VAD_THRESHOLD_DB, VAD_MIN_SILENCE],
+        # Segments are cut at chunk boundaries when the audio is split across workers
+        "chunk_seconds": CHUNK_SECONDS if TRANSCRIBE_WORKERS > 1 else None,
+        "sampling": sampling_method,
+        "adaptive_bounds": [ADAPTIVE_MIN_INTERVAL, ADAPTIVE_MAX_INTERVAL] if sampling_method == "adaptive" else None,
+        "change_min_pixels": CHANGE_MIN_PIXELS,
+        "blur_threshold": [BLUR_THRESHOLD, ANALYSIS_WIDTH],
+        "ocr": [SLIDE_REGION_DETECTION, SCENE_CHANGE_THRESHOLD, OCR_TARGET_DPI],
+        "pdf_images": [PDF_IMAGE_DPI, PDF_JPEG_QUALITY],
+        "repeat_ratio": 0.85,
+        "line_change_ratio": 0.5,
+    }
+
+def video_cache_key(video_path, params):
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def segment_record(seg):
+    return {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+
+class ResultCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, "result.json"), encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        for shot in entry["screenshots"]:
+            shot["image"] = os.path.join(entry_dir, shot["image"])
+            if not os.path.exists(shot["image"]):
+                return None
+
+        # The result file's mtime doubles as the last-used time for eviction
+        os.utime(os.path.join(entry_dir, "result.json"))
+        return entry
+
+    def put(self, key, url, segments, screenshots):
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        # Build the entry next to its final location and rename it into place,
+        # so concurrent jobs never observe a half-written entry.
+        os.makedirs(self.root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=f".{key[:16]}-", dir=self.root)
+        try:
+            os.makedirs(os.path.join(staging_dir, "images"))
+            shots = []
+            for shot in screenshots:
+                image = os.path.join("images", screenshot_name(shot["time"]))
+                write_image(shot["image"], os.path.join(staging_dir, image))
+                shots.append({"time": shot["time"], "image": image, "text": shot["text"]})
+
+            entry = {
+                "url": url,
+                "segments": [segment_record(seg) for seg in segments],
+                "screenshots": shots,
+            }
+            with open(os.path.join(staging_dir, "result.json"), 'w', encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.rename(staging_dir, entry_dir)
+        except OSError as e:
+            print(f"[CACHE] Could not store {key[:12]}: {e}", file=sys.stderr)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            entry_dir = os.path.join(self.root, name)
+            result_file = os.path.join(entry_dir, "result.json")
+            if name.startswith(".") or not os.path.exists(result_file):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(dirpath, filename))
+                for dirpath, _, filenames in os.walk(entry_dir)
+                for filename in filenames
+            )
+            entries.append((os.path.getmtime(result_file), size, entry_dir))
+            total += size
+
+        # Least recently used first
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            print(f"[CACHE] Evicted {os.path.basename(entry_dir)[:12]}", file=sys.stderr)
+
+result_cache = ResultCache()
+
+# --------------------------
+# Stage Checkpoints
+# --------------------------
+
+# Each job keeps the output of its expensive stages under CHECKPOINT_DIR/<job_id>
+# until it succeeds. A retry after a failed PDF build or upload picks up the
+# transcript, screenshots and PDF from there instead of re-running Whisper and
+# OCR. Every checkpoint records the video/parameter fingerprint it was made for
+# and is ignored if that doesn't match.
+
+def try_lock(file):
+    # Non-blocking exclusive lock on an open file. The OS drops it when the
+    # file is closed or the process dies, so a crashed job never leaves its
+    # checkpoints locked.
+    try:
+        if msvcrt:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+class JobCheckpoints:
+    def __init__(self, job_id, fingerprint, root=CHECKPOINT_DIR):
+        self.job_dir = os.path.join(root, job_id)
+        self.fingerprint = fingerprint
+        self._lock_file = None
+
+    # A job directory is used by one job at a time: a second job for the same
+    # video and parameters that fails to acquire() it while the first is still
+    # running has to work on its own set of checkpoints instead.
+
+    def acquire(self):
+        os.makedirs(self.job_dir, exist_ok=True)
+        file = open(self.path(".lock"), 'a+b')
+        if not try_lock(file):
+            file.close()
+            return False
+        self._lock_file = file
+        return True
+
+    def release(self):
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def path(self, name):
+        return os.path.join(self.job_dir, name)
+
+    def load(self, stage):
+        try:
+            with open(self.path(f"{stage}.json"), encoding="utf-8") as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("fingerprint") != self.fingerprint:
+            return None
+        return checkpoint["data"]
+
+    def save(self, stage, data):
+        os.makedirs(self.job_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, prefix=f"{stage}-", suffix=".tmp")
+        with open(fd, 'w', encoding="utf-8") as file:
+            json.dump({"fingerprint": self.fingerprint, "data": data}, file)
+        os.replace(tmp_path, self.path(f"{stage}.json"))
+
+    def store_file(self, src, name):
+        # Write-then-rename, so a job reading checkpoints never sees a partial
+        # file. `src` is a path or the file's bytes.
+        dst = self.path(name)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+        os.close(fd)
+        write_image(src, tmp_path)
+        os.replace(tmp_path, dst)
+
+    def restore_file(self, name, dst):
+        try:
+            shutil.copyfile(self.path(name), dst)
+            return True
+        except OSError:
+            return False
+
+    def save_screenshots(self, screenshots):
+        manifest = []
+        for shot in screenshots:
+            name = os.path.join("screenshots", screenshot_name(shot["time"]))
+            self.store_file(shot["image"], name)
+            manifest.append({"time": shot["time"], "image": name, "text": shot["text"]})
+        self.save("screenshots", manifest)
+
+    def load_screenshots(self):
+        manifest = self.load("screenshots")
+        if manifest is None:
+            return None
+
+        screenshots = []
+        for shot in manifest:
+            try:
+                with open(self.path(shot["image"]), 'rb') as file:
+                    image = file.read()
+            except OSError:
+                return None
+            screenshots.append({"time": shot["time"], "image": image, "text": shot["text"]})
+        return screenshots
+
+    def clear(self):
+        # Deleted before the lock goes, so no other job can acquire the
+        # directory halfway through. Windows keeps the open lock file; the
+        # empty directory is left to evict_stale_checkpoints.
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+        self.release()
+
+def evict_stale_checkpoints(root=CHECKPOINT_DIR, max_age=CHECKPOINT_MAX_AGE):
+    # Jobs that fail and are never retried would otherwise leave their
+    # transcript, screenshots and PDF behind for good. A job directory is
+    # stale once nothing in it has been written for `max_age` seconds.
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    now = time.time()
+    for name in names:
+        job_dir = os.path.join(root, name)
+        try:
+            last_write = max(
+                os.path.getmtime(os.path.join(dirpath, entry))
+                for dirpath, dirnames, filenames in os.walk(job_dir)
+                for entry in dirnames + filenames + ["."]
+            )
+        except (OSError, ValueError):
+            continue
+        if now - last_write > max_age:
+            checkpoints = JobCheckpoints(name, None, root)
+            # Skip directories a running job still holds
+            if checkpoints.acquire():
+                checkpoints.clear()
+                print(f"[CHECKPOINT] Evicted stale {name[:12]}", file=sys.stderr)
@@ -0,0 +1,46 @@
+import heapq
+import threading
+
+# --------------------------
+# Merge Timeline
+# --------------------------
+
+def transcript_entry(seg):
+    return {"type": "transcript", "time": seg["start"], "content": seg["text"]}
+
+def screenshot_entry(shot):
+    return {"type": "screenshot", "time": shot["time"], "content": shot["image"], "text": shot["text"]}
+
+def merge_timeline(transcript_segments, screenshots):
+    timeline = [transcript_entry(seg) for seg in transcript_segments]
+    timeline += [screenshot_entry(shot) for shot in screenshots]
+    return sorted(timeline, key=lambda x: x["time"])
+
+class TimelineMerger:
+    # Interleaves the transcript and screenshot streams while both stages are
+    # still running. Each stream pushes its entries in time order along with
+    # a time `until` which it has fully covered; an entry is handed to `sink`
+    # once every stream has moved past it, in the same order merge_timeline
+    # would have produced (transcript first on equal times).
+    def __init__(self, sink, streams=("transcript", "screenshots")):
+        self.sink = sink
+        self.streams = list(streams)
+        self.covered = dict.fromkeys(streams, float("-inf"))
+        self.heap = []
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def push(self, stream, entries, until):
+        with self.lock:
+            order = self.streams.index(stream)
+            for entry in entries:
+                heapq.heappush(self.heap, (entry["time"], order, self.count, entry))
+                self.count += 1
+            self.covered[stream] = max(self.covered[stream], until)
+
+            ready = min(self.covered.values())
+            while self.heap and self.heap[0][0] < ready:
+                self.sink(heapq.heappop(self.heap)[-1])
+
+    def finish(self, stream, entries=()):
+        self.push(stream, entries, float("inf"))
@@ -0,0 +1,319 @@
+import bisect
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import (
+    AUDIO_SAMPLE_RATE, CHUNK_SECONDS, FASTER_WHISPER_COMPUTE_TYPE, FFMPEG_PATH, TRANSCRIBE_BACKEND,
+    TRANSCRIBE_WORKERS, VAD_ENABLED, VAD_MIN_SILENCE, VAD_THRESHOLD_DB, WHISPER_MODEL
+)
+from .events import emit_progress
+from .storage import segment_record
+
+# --------------------------
+# Audio & Transcript
+# --------------------------
+
+def extract_audio_from_video(video_path, audio_path):
+    command = [
+        FFMPEG_PATH, '-i', video_path, '-vn',
+        '-acodec', 'pcm_s16le', '-ar', '44100', '-ac', '2', audio_path
+    ]
+    subprocess.run(command, check=True)
+    print(f"[AUDIO] Extracted to {audio_path}", file=sys.stderr)
+
+def load_audio_from_video(video_path, sample_rate=AUDIO_SAMPLE_RATE):
+    # Have ffmpeg resample straight to the 16 kHz mono Whisper works on and
+    # read the PCM from the pipe, instead of writing a full-length 44.1 kHz
+    # stereo WAV that Whisper would decode and resample all over again.
+    command = [
+        FFMPEG_PATH, '-nostdin', '-v', 'error', '-i', video_path, '-vn',
+        '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-ac', '1', 'pipe:1'
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.stderr:
+        print(result.stderr.decode(errors="replace"), file=sys.stderr, end="")
+    if result.returncode != 0:
+        # e.g. a video without an audio stream; keep ffmpeg's reason in the job error
+        errors = result.stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg could not decode the audio (exit status {result.returncode}): {errors}")
+    audio = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+    print(f"[AUDIO] Decoded {len(audio) / sample_rate:.1f}s of audio in memory", file=sys.stderr)
+    return audio
+
+# Transcription backends share one interface: build with a model name (and an
+# optional CPU thread budget), then transcribe(audio) with a path or 16 kHz
+# float32 samples, returning {"text": ..., "segments": [{"id", "start", "end", "text"}]}.
+
+class WhisperTranscriber:
+    def __init__(self, model_name, threads=0):
+        # Imported here so only workers that transcribe with it pay for torch
+        import whisper
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = whisper.load_model(model_name)
+
+    def transcribe(self, audio):
+        result = self.model.transcribe(audio)
+        return {"text": result["text"], "segments": result.get("segments", [])}
+
+class FasterWhisperTranscriber:
+    # CTranslate2 runtime; int8 weights run several times faster than torch on CPU
+    def __init__(self, model_name, threads=0, compute_type=FASTER_WHISPER_COMPUTE_TYPE):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("The faster-whisper backend needs the faster-whisper package (pip install faster-whisper)")
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe(self, audio):
+        # Segments are produced lazily while iterating
+        segments, _ = self.model.transcribe(audio)
+        segments = [
+            {"id": index, "start": seg.start, "end": seg.end, "text": seg.text}
+            for index, seg in enumerate(segments)
+        ]
+        return {"text": "".join(seg["text"] for seg in segments), "segments": segments}
+
+TRANSCRIBERS = {
+    "whisper": WhisperTranscriber,
+    "faster-whisper": FasterWhisperTranscriber,
+}
+
+_transcribers = {}
+
+def evict_other_models(cache, key, is_default, release=None):
+    # The worker's default model stays resident for the life of the process.
+    # Any other model is kept only until a job asks for yet another one, so a
+    # worker never holds more than two, whatever jobs request.
+    if is_default(key):
+        return
+    for other in [other for other in cache if other != key and not is_default(other)]:
+        print(f"[TRANSCRIBE] Unloading {other}", file=sys.stderr)
+        evicted = cache.pop(other)
+        if release:
+            release(evicted)
+
+def load_transcriber(backend=TRANSCRIBE_BACKEND, model_name=WHISPER_MODEL):
+    # Loaded models are kept so a worker only pays the runtime/model start-up
+    # cost once per backend and model (see evict_other_models).
+    if backend not in TRANSCRIBERS:
+        raise ValueError(f"Unknown transcription backend '{backend}', expected one of {tuple(TRANSCRIBERS)}")
+    key = (backend, model_name)
+    if key not in _transcribers:
+        evict_other_models(_transcribers, key, lambda other: other == (TRANSCRIBE_BACKEND, WHISPER_MODEL))
+        print(f"[TRANSCRIBE] Loading {backend} model '{model_name}'...", file=sys.stderr)
+        _transcribers[key] = TRANSCRIBERS[backend](model_name)
+    return _transcribers[key]
+
+def frame_energies(audio, sample_rate=AUDIO_SAMPLE_RATE, frame_ms=30):
+    # RMS energy of consecutive `frame_ms` windows
+    frame_length = int(sample_rate * frame_ms / 1000)
+    frames = audio[:len(audio) // frame_length * frame_length].reshape(-1, frame_length)
+    return np.sqrt(np.mean(frames ** 2, axis=1)), frame_length
+
+def find_chunk_boundaries(audio, sample_rate=AUDIO_SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS, search_seconds=30):
+    # Split roughly every `chunk_seconds`, at the quietest half second within
+    # `search_seconds` of each target, so cuts land in pauses between words.
+    # Short chunks search at most half a chunk either way, so every cut lands
+    # past the previous one.
+    search_seconds = min(search_seconds, chunk_seconds / 2)
+    energies, frame_length = frame_energies(audio, sample_rate)
+    smooth = max(int(0.5 * sample_rate / frame_length), 1)
+    energies = np.convolve(energies, np.ones(smooth) / smooth, mode="same")
+    frames_per_second = sample_rate / frame_length
+
+    boundaries = [0]
+    target = chunk_seconds
+    while (len(audio) / sample_rate) - target > chunk_seconds / 2:
+        lo = int((target - search_seconds) * frames_per_second)
+        hi = min(int((target + search_seconds) * frames_per_second), len(energies))
+        quietest = lo + int(np.argmin(energies[lo:hi]))
+        boundaries.append(quietest * frame_length)
+        target = quietest / frames_per_second + chunk_seconds
+    boundaries.append(len(audio))
+    return boundaries
+
+def detect_speech_regions(audio, sample_rate=AUDIO_SAMPLE_RATE, threshold_db=VAD_THRESHOLD_DB,
+                          min_silence=VAD_MIN_SILENCE, padding=0.3):
+    # Energy VAD: a frame is speech when it is within `threshold_db` of the
+    # loud part of the recording (95th percentile), so mic gain doesn't matter.
+    # Only pauses longer than `min_silence` seconds are cut; shorter ones stay
+    # so Whisper still hears natural phrasing. Returns (start, end) samples.
+    energies, frame_length = frame_energies(audio, sample_rate)
+    if not len(energies):
+        return [(0, len(audio))]
+    reference = np.percentile(energies, 95)
+    if reference <= 0:
+        return []
+
+    speech = 20 * np.log10(energies / reference + 1e-10) > threshold_db
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    pad = int(padding * sample_rate)
+    gap = int(min_silence * sample_rate)
+
+    regions = []
+    for start_frame, end_frame in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        start = max(start_frame * frame_length - pad, 0)
+        end = min(end_frame * frame_length + pad, len(audio))
+        if regions and start - regions[-1][1] < gap:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+def timestamp_mapper(regions, sample_rate=AUDIO_SAMPLE_RATE):
+    # Map times in the silence-stripped audio back onto the original recording
+    compact_starts = []
+    position = 0
+    for start, end in regions:
+        compact_starts.append(position)
+        position += end - start
+
+    def original_time(t, is_end):
+        sample = t * sample_rate
+        # An end exactly on a join belongs to the region before it
+        index = (bisect.bisect_left if is_end else bisect.bisect_right)(compact_starts, sample) - 1
+        index = min(max(index, 0), len(regions) - 1)
+        return (regions[index][0] + sample - compact_starts[index]) / sample_rate
+
+    return original_time
+
+def restore_timestamps(segments, regions, sample_rate=AUDIO_SAMPLE_RATE):
+    original_time = timestamp_mapper(regions, sample_rate)
+    return [
+        {**seg, "start": original_time(seg["start"], False), "end": original_time(seg["end"], True)}
+        for seg in segments
+    ]
+
+# Chunk transcription runs in separate processes, each holding its own model.
+# Pools are kept and evicted like the in-process models.
+_transcribe_pools = {}
+_chunk_transcriber = None
+
+def _init_chunk_worker(backend, model_name, threads):
+    global _chunk_transcriber
+    _chunk_transcriber = TRANSCRIBERS[backend](model_name, threads)
+
+def _transcribe_chunk(audio):
+    result = _chunk_transcriber.transcribe(audio)
+    return result["text"], [segment_record(seg) for seg in result["segments"]]
+
+def get_transcribe_pool(backend, model_name, workers):
+    key = (backend, model_name, workers)
+    if key not in _transcribe_pools:
+        evict_other_models(_transcribe_pools, key, lambda other: other[:2] == (TRANSCRIBE_BACKEND, WHISPER_MODEL),
+                           lambda pool: pool.shutdown(wait=False, cancel_futures=True))
+        threads = max((os.cpu_count() or workers) // workers, 1)
+        # spawn, not fork: forking a process that already runs torch threads can deadlock
+        _transcribe_pools[key] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_chunk_worker,
+            initargs=(backend, model_name, threads)
+        )
+    return _transcribe_pools[key]
+
+def discard_transcribe_pool(backend, model_name, workers):
+    pool = _transcribe_pools.pop((backend, model_name, workers), None)
+    if pool:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def transcribe_chunked(audio, backend=TRANSCRIBE_BACKEND, model_name=WHISPER_MODEL,
+                       workers=TRANSCRIBE_WORKERS, on_chunk=None, progress=None):
+    boundaries = find_chunk_boundaries(audio)
+    chunks = list(zip(boundaries[:-1], boundaries[1:]))
+    print(f"[TRANSCRIBE] {len(chunks)} chunks across {workers} processes", file=sys.stderr)
+
+    futures = None
+    restarted = False
+    texts, segments = [], []
+    for index, (start, end) in enumerate(chunks):
+        while True:
+            try:
+                if futures is None:
+                    pool = get_transcribe_pool(backend, model_name, workers)
+                    futures = deque(pool.submit(_transcribe_chunk, audio[lo:hi]) for lo, hi in chunks[index:])
+                text, chunk_segments = futures.popleft().result()
+                break
+            except BrokenProcessPool:
+                # A chunk process died (out of memory, or the model failed to
+                # load) and took the pool with it. Replace the pool and resubmit
+                # the chunks not done yet, once per job.
+                discard_transcribe_pool(backend, model_name, workers)
+                futures = None
+                if restarted:
+                    raise
+                restarted = True
+                print(f"[TRANSCRIBE] Chunk processes died, restarting from chunk {index + 1}", file=sys.stderr)
+        offset = start / AUDIO_SAMPLE_RATE
+        texts.append(text.strip())
+        first = len(segments)
+        for seg in chunk_segments:
+            segments.append({
+                "id": len(segments),
+                "start": seg["start"] + offset,
+                "end": seg["end"] + offset,
+                "text": seg["text"]
+            })
+        # Chunks finish in order, so everything before `end` is final
+        if on_chunk:
+            on_chunk(segments[first:], end / AUDIO_SAMPLE_RATE)
+        emit_progress(progress, "transcribe", chunks_done=index + 1, chunks=len(chunks), segments=len(segments))
+
+    return {"text": " ".join(texts), "segments": segments}
+
+def transcribe_audio_to_segments(audio, transcript_txt, model_name=WHISPER_MODEL, backend=TRANSCRIBE_BACKEND,
+                                 workers=TRANSCRIBE_WORKERS, vad=VAD_ENABLED, on_segments=None, progress=None):
+    # `audio` is either a file path or a float32 array of 16 kHz mono samples.
+    # In-memory audio has long silences removed first, and long audio is cut
+    # at pauses and transcribed on several processes; timestamps come back
+    # relative to the original recording either way.
+    # `on_segments(segments, until)` is handed every segment exactly once, as
+    # soon as all segments starting before `until` seconds are known.
+    regions = None
+    if vad and not isinstance(audio, str):
+        regions = detect_speech_regions(audio)
+        speech_samples = sum(end - start for start, end in regions)
+        print(f"[VAD] {speech_samples / AUDIO_SAMPLE_RATE:.1f}s of speech in "
+              f"{len(audio) / AUDIO_SAMPLE_RATE:.1f}s of audio", file=sys.stderr)
+        if regions and speech_samples < 0.95 * len(audio):
+            audio = np.concatenate([audio[start:end] for start, end in regions])
+        elif regions:
+            regions = None
+
+    def release_chunk(segments, until):
+        if regions:
+            segments = restore_timestamps(segments, regions)
+            until = timestamp_mapper(regions)(until, False)
+        on_segments(segments, until)
+
+    streamed = False
+    if regions == []:
+        # Nothing but silence; Whisper would only hallucinate text into it
+        result = {"text": "", "segments": []}
+    elif workers > 1 and not isinstance(audio, str) and len(audio) > 2 * CHUNK_SECONDS * AUDIO_SAMPLE_RATE:
+        result = transcribe_chunked(audio, backend, model_name, workers, release_chunk if on_segments else None,
+                                    progress)
+        streamed = True
+    else:
+        result = load_transcriber(backend, model_name).transcribe(audio)
+
+    with open(transcript_txt, 'w', encoding="utf-8") as file:
+        file.write(result["text"])
+
+    print(f"[TRANSCRIBE] Saved full transcript to {transcript_txt}", file=sys.stderr)
+    segments = result.get("segments", [])
+    if regions:
+        segments = restore_timestamps(segments, regions)
+    if on_segments and not streamed:
+        on_segments(segments, float("inf"))
+    return segments
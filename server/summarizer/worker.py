@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import time
+import threading
+
+from .config import PROFILE_JOBS, TRANSCRIBE_BACKEND, WHISPER_MODEL
+from .events import JobMetrics
+from .pipeline import run_pipeline
+from .profiling import job_profiler, profile_field
+
+# --------------------------
+# Worker Mode
+# --------------------------
+
+# Long-lived mode used by the Node server: one JSON job per stdin line,
+#   {"id": ..., "video_path": ..., "pdf_name": ..., "job_id": ..., "rebuild_pdf": ...,
+#    "model": ..., "backend": ..., "profile": ...}
+# answered by exactly one JSON line on stdout carrying the same "id"; all but
+# the first three fields are optional. Before that, the job may emit
+# any number of {"id": ..., "event": "progress", "stage": ..., ...} lines. The
+# reply carries the job's JobMetrics under "metrics", whether it succeeded or
+# not, and the profile directory under "profile" for profiled jobs. The
+# Whisper model, Tesseract and Cloudinary config stay loaded between jobs.
+
+def run_worker(stdin=sys.stdin, stdout=sys.stdout, progress_interval=0.5):
+    # Anything else that prints would corrupt the protocol, so stray output
+    # goes to stderr alongside the regular logs.
+    sys.stdout = sys.stderr
+    stdout_lock = threading.Lock()
+
+    def reply(message):
+        with stdout_lock:
+            stdout.write(json.dumps(message) + "\n")
+            stdout.flush()
+
+    def progress_reporter(job_id):
+        # Status changes always go out; per-frame updates at most every
+        # `progress_interval` seconds per stage.
+        last_sent = {}
+
+        def report(event):
+            now = time.monotonic()
+            stage = event["stage"]
+            if "status" not in event and now - last_sent.get(stage, float("-inf")) < progress_interval:
+                return
+            last_sent[stage] = now
+            reply({"id": job_id, "event": "progress", **event})
+        return report
+
+    from .transcription import load_transcriber
+    load_transcriber()
+    reply({"event": "ready"})
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        metrics = JobMetrics()
+        profiler = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            profiler = job_profiler(job["pdf_name"], job.get("profile") or PROFILE_JOBS)
+            with metrics.timer("total"), profiler:
+                url = run_pipeline(
+                    job["video_path"], job["pdf_name"],
+                    rebuild_pdf=job.get("rebuild_pdf", False),
+                    job_id=job.get("job_id"),
+                    model_name=job.get("model") or WHISPER_MODEL,
+                    backend=job.get("backend") or TRANSCRIBE_BACKEND,
+                    metrics=metrics,
+                    progress=progress_reporter(job_id)
+                )
+            reply({"id": job_id, "success": True, "url": url, "metrics": metrics.as_dict(), **profile_field(profiler)})
+        except Exception as e:
+            print(f"[WORKER] Job {job_id} failed: {e}", file=sys.stderr)
+            reply({
+                "id": job_id,
+                "success": False,
+                "error": "Video summarization failed.",
+                "details": str(e),
+                "metrics": metrics.as_dict(),
+                **profile_field(profiler)
+            })
+
+# --------------------------
+# Main
+# --------------------------
+
+# `python newserver.py --worker` for the Node server, or
+# `python newserver.py <video_path> <pdf_output_path>` for a one-off job that
+# prints a single JSON result. Returns the process exit code.
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == ["--worker"]:
+        run_worker()
+        return 0
+
+    if len(argv) != 2:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid arguments. Usage: python {os.path.basename(sys.argv[0])} <video_path> <pdf_output_path> | --worker"
+        }))
+        return 1
+
+    video_path, pdf_name = argv
+
+    try:
+        with job_profiler(pdf_name):
+            url = run_pipeline(video_path, pdf_name)
+
+        # ✅ Only this output goes to stdout for Node.js
+        print(json.dumps({
+            "success": True,
+            "url": url
+        }))
+        return 0
+
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": "Video summarization failed.",
+            "details": str(e)
+        }))
+        return 1